@@ -0,0 +1,136 @@
+"""Аутентификация по токену с кешированием пользователя.
+
+Поля профиля пользователя (без пароля и счётчиков) ищутся по токену
+сначала в LRU-кеше процесса с коротким временем жизни, затем в общем
+кеше и только потом в базе. Каждый запрос получает свой объект User,
+остальные поля которого отложены: они читаются из базы при обращении,
+а save() записывает только загруженные поля. При удалении
+токена (выход через djoser) и при сохранении пользователя (в том числе
+смене пароля в SetPasswordSerializer) записи удаляются из общего кеша
+и из кеша текущего процесса; в других процессах запись живёт
+не дольше AUTH_TOKEN_LOCAL_TIMEOUT.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .instrumentation import counters
+
+USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+class LocalCache:
+    """LRU-кеш с временем жизни записей."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = (value, time.monotonic() + self.timeout)
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+
+local_cache = LocalCache(
+    settings.AUTH_TOKEN_LOCAL_SIZE, settings.AUTH_TOKEN_LOCAL_TIMEOUT
+)
+
+
+def cache_key(key):
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    local_cache.delete(key)
+    cache.delete(cache_key(key))
+
+
+def invalidate_user_tokens(user):
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+def token_cache_stats():
+    """Попадания в кеши токенов и их доля от всех проверок."""
+    values = counters.snapshot()
+    local = values.get('token_cache.local_hit', 0)
+    shared = values.get('token_cache.shared_hit', 0)
+    miss = values.get('token_cache.miss', 0)
+    total = local + shared + miss
+    return {
+        'local_hit': local,
+        'shared_hit': shared,
+        'miss': miss,
+        'hit_ratio': round((local + shared) / total, 4) if total else None,
+    }
+
+
+def user_values(user):
+    return tuple(getattr(user, field) for field in USER_FIELDS)
+
+
+def restore_user(values):
+    """Новый объект User из закешированных полей профиля."""
+    model = get_user_model()
+    values = dict(zip(USER_FIELDS, values))
+    names = [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in values
+    ]
+    return model.from_db(
+        model.objects.db, names, [values[name] for name in names]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к базе на каждый запрос."""
+
+    def authenticate_credentials(self, key):
+        values = local_cache.get(key)
+        if values is not None:
+            counters.increment('token_cache.local_hit')
+        else:
+            values = cache.get(cache_key(key))
+            if values is not None:
+                counters.increment('token_cache.shared_hit')
+            else:
+                counters.increment('token_cache.miss')
+                user, _ = super().authenticate_credentials(key)
+                values = user_values(user)
+                cache.set(
+                    cache_key(key), values, settings.AUTH_TOKEN_CACHE_TIMEOUT
+                )
+            local_cache.set(key, values)
+        user = restore_user(values)
+        return user, Token(key=key, user=user)
@@ -0,0 +1,245 @@
+"""Сценарии нагрузочных замеров API, замер запроса и формат отчёта.
+
+Один и тот же список сценариев используется командой benchmark_api
+(запросы через тестовый клиент в процессе, с подсчётом SQL-запросов),
+командой load_test (HTTP-запросы к запущенному серверу) и тестом
+api.tests.BenchmarkScenariosTest, поэтому их отчёты можно сравнивать
+между собой. Команды benchmark_* печатают и сохраняют отчёт через
+write_report.
+"""
+import base64
+import json
+import math
+import platform
+import time
+from collections import namedtuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+USERNAME_PREFIX = 'bench_'
+PASSWORD = 'benchmark-password'
+
+Scenario = namedtuple(
+    'Scenario', ('name', 'method', 'path', 'auth', 'data', 'weight')
+)
+
+SCENARIOS = (
+    Scenario('users-list', 'get', '/api/users/', True, None, 1),
+    Scenario('users-detail', 'get', '/api/users/{author}/', False, None, 1),
+    Scenario('users-me', 'get', '/api/users/me/', True, None, 1),
+    Scenario(
+        'users-subscriptions', 'get',
+        '/api/users/subscriptions/?recipes_limit=3', True, None, 2
+    ),
+    Scenario(
+        'users-subscribe', 'post', '/api/users/{author}/subscribe/',
+        True, None, 1
+    ),
+    Scenario(
+        'users-unsubscribe', 'delete', '/api/users/{author}/subscribe/',
+        True, None, 1
+    ),
+    Scenario('tags-list', 'get', '/api/tags/', False, None, 1),
+    Scenario('tags-detail', 'get', '/api/tags/{tag}/', False, None, 1),
+    Scenario('ingredients-list', 'get', '/api/ingredients/', False, None, 1),
+    Scenario(
+        'ingredients-search', 'get', '/api/ingredients/?name={query}',
+        False, None, 4
+    ),
+    Scenario(
+        'ingredients-detail', 'get', '/api/ingredients/{ingredient}/',
+        False, None, 1
+    ),
+    Scenario('recipes-list-anonymous', 'get', '/api/recipes/', False, None, 6),
+    Scenario('recipes-list', 'get', '/api/recipes/', True, None, 6),
+    Scenario(
+        'recipes-list-tags', 'get', '/api/recipes/?tags={tag_slug}',
+        True, None, 3
+    ),
+    Scenario(
+        'recipes-list-author', 'get', '/api/recipes/?author={author}',
+        True, None, 2
+    ),
+    Scenario(
+        'recipes-list-popular', 'get', '/api/recipes/?ordering=popular',
+        True, None, 2
+    ),
+    Scenario(
+        'recipes-list-trending', 'get',
+        '/api/recipes/?ordering=trending&tags={tag_slug}', True, None, 2
+    ),
+    Scenario(
+        'recipes-list-favorited', 'get', '/api/recipes/?is_favorited=1',
+        True, None, 1
+    ),
+    Scenario(
+        'recipes-list-cursor', 'get', '/api/recipes/?cursor=',
+        True, None, 1
+    ),
+    Scenario(
+        'recipes-search', 'get', '/api/recipes/?search={recipe_word}',
+        False, None, 3
+    ),
+    Scenario('recipes-feed', 'get', '/api/recipes/feed/', True, None, 3),
+    Scenario('recipes-detail', 'get', '/api/recipes/{recipe}/', True, None, 4),
+    Scenario(
+        'recipes-favorite', 'post', '/api/recipes/{recipe}/favorite/',
+        True, None, 1
+    ),
+    Scenario(
+        'recipes-unfavorite', 'delete', '/api/recipes/{recipe}/favorite/',
+        True, None, 1
+    ),
+    Scenario(
+        'recipes-cart-add', 'post', '/api/recipes/{recipe}/shopping_cart/',
+        True, None, 1
+    ),
+    Scenario(
+        'recipes-cart-remove', 'delete',
+        '/api/recipes/{recipe}/shopping_cart/', True, None, 1
+    ),
+    Scenario(
+        'recipes-download-txt', 'get',
+        '/api/recipes/download_shopping_cart/?format=txt', True, None, 1
+    ),
+    Scenario(
+        'recipes-download-pdf', 'get',
+        '/api/recipes/download_shopping_cart/?format=pdf', True, None, 1
+    ),
+    Scenario(
+        'recipes-create-dry-run', 'post', '/api/recipes/?dry_run=1',
+        True, 'recipe', 1
+    ),
+)
+
+# Картинка 1x1 PNG для проверки создания рецепта.
+IMAGE = 'data:image/png;base64,' + base64.b64encode(bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000d4944415478da636460f85f0f0002870180eb47ba920000000049454e44'
+    'ae426082'
+)).decode()
+
+
+def scenario_context(user):
+    """Объекты для подстановки в пути сценариев или None, если данных
+    не хватает."""
+    recipe = Recipe.objects.exclude(
+        favorite_recipe__user=user
+    ).exclude(shopping_recipe__user=user).order_by('pk').first()
+    author = User.objects.exclude(pk=user.pk).exclude(
+        subscribing__user=user
+    ).order_by('pk').first()
+    tag = Tag.objects.order_by('pk').first()
+    ingredient = Ingredient.objects.order_by('pk').first()
+    if None in (recipe, author, tag, ingredient):
+        return None
+    return {
+        'recipe': recipe.pk,
+        'author': author.pk,
+        'tag': tag.pk,
+        'tag_slug': tag.slug,
+        'ingredient': ingredient.pk,
+        'query': ingredient.name[:3],
+        'recipe_word': recipe.name.split()[0],
+    }
+
+
+def scenario_path(scenario, context):
+    return scenario.path.format(**{
+        key: quote(str(value)) for key, value in context.items()
+    })
+
+
+def scenario_data(scenario, context):
+    """Тело запроса сценария."""
+    if scenario.data != 'recipe':
+        return None
+    return {
+        'ingredients': [{'id': context['ingredient'], 'amount': 10}],
+        'tags': [context['tag']],
+        'image': IMAGE,
+        'name': 'Рецепт для замера',
+        'text': 'Описание',
+        'cooking_time': 10,
+    }
+
+
+def percentile(values, share):
+    """Перцентиль методом ближайшего ранга."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(math.ceil(share * len(values)) - 1, 0)]
+
+
+def summarize(samples, elapsed=None):
+    """Отчёт по замерам {сценарий: [(мс, запросов или None, статус)]}."""
+    scenarios = {}
+    for name, rows in sorted(samples.items()):
+        times = [row[0] for row in rows]
+        queries = [row[1] for row in rows if row[1] is not None]
+        errors = sum(1 for row in rows if row[2] >= 400)
+        scenarios[name] = {
+            'requests': len(rows),
+            'errors': errors,
+            'mean_ms': round(sum(times) / len(times), 2),
+            'p50_ms': round(percentile(times, 0.5), 2),
+            'p95_ms': round(percentile(times, 0.95), 2),
+            'p99_ms': round(percentile(times, 0.99), 2),
+            'max_ms': round(max(times), 2),
+            'queries': percentile(queries, 0.5),
+        }
+        if elapsed:
+            scenarios[name]['rps'] = round(len(rows) / elapsed, 2)
+    return {
+        'created': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'cache': settings.CACHES['default']['BACKEND'],
+        'fast_serializers': settings.FAST_SERIALIZERS,
+        'elapsed_s': round(elapsed, 2) if elapsed else None,
+        'scenarios': scenarios,
+    }
+
+
+def measure(client, method, path, data=None):
+    """Запрос тестовым клиентом: (мс, число SQL-запросов, ответ)."""
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = getattr(client, method)(path, data, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - started
+    return elapsed * 1000, len(queries), response
+
+
+def report_line(name, row, width):
+    line = (
+        f'{name:{width}} p50 {row["p50_ms"]:8.2f} мс  '
+        f'p95 {row["p95_ms"]:8.2f} мс'
+    )
+    if 'rps' in row:
+        line += f'  {row["rps"]:7.2f} запр/с'
+    if row['queries'] is not None:
+        line += f'  запросов {row["queries"]:3}'
+    if 'found' in row:
+        line += f'  найдено {row["found"]}'
+    return line + f'  ошибок {row["errors"]}'
+
+
+def write_report(stdout, report, output=None):
+    """Печать отчёта summarize по строке на сценарий и сохранение
+    в JSON-файл output."""
+    width = max(map(len, report['scenarios']), default=0) + 2
+    for name, row in report['scenarios'].items():
+        stdout.write(report_line(name, row, width))
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
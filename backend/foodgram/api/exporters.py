@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import renderers
+
+TITLE = 'Cписок покупок:'
+
+
+class ShoppingCartExporter(renderers.BaseRenderer):
+    """Базовый экспорт списка покупок.
+
+    Экспортеры подключаются к действию как рендереры, поэтому формат
+    выбирается штатным параметром ?format= или заголовком Accept.
+    Сам файл отдаётся потоком через stream(), render() нужен только
+    для ответов с ошибками.
+    """
+    charset = 'utf-8'
+    extension = None
+
+    def stream(self, ingredients):
+        """Части файла для строк (название, количество, единица)."""
+        raise NotImplementedError
+
+    def error_text(self, data):
+        if isinstance(data, dict):
+            return '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return self.error_text(data).encode(self.charset)
+
+
+class TextExporter(ShoppingCartExporter):
+    media_type = 'text/plain'
+    format = 'txt'
+    extension = 'txt'
+
+    def stream(self, ingredients):
+        yield TITLE
+        for ingredient in ingredients:
+            yield '\n{} - {} {}.'.format(*ingredient)
+
+
+class Echo:
+    """Буфер для csv.writer, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class CSVExporter(ShoppingCartExporter):
+    media_type = 'text/csv'
+    format = 'csv'
+    extension = 'csv'
+
+    def stream(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'amount', 'measurement_unit'))
+        for ingredient in ingredients:
+            yield writer.writerow(ingredient)
+
+
+class JSONExporter(ShoppingCartExporter):
+    media_type = 'application/json'
+    format = 'json'
+    extension = 'json'
+
+    def stream(self, ingredients):
+        separator = '['
+        for name, amount, measurement_unit in ingredients:
+            yield separator + json.dumps(
+                {
+                    'name': name,
+                    'amount': amount,
+                    'measurement_unit': measurement_unit,
+                },
+                ensure_ascii=False
+            )
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+class PDFExporter(ShoppingCartExporter):
+    """Экспорт в PDF.
+
+    reportlab собирает документ целиком, поэтому файл отдаётся одной
+    частью после прохода по строкам.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    extension = 'pdf'
+    charset = None
+    font_name = 'ShoppingCartFont'
+    font_size = 12
+    margin = 50
+
+    def build(self, lines):
+        if self.font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, settings.SHOPPING_CART_PDF_FONT)
+            )
+        buffer = io.BytesIO()
+        document = canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        y = height - self.margin
+        for line in lines:
+            if y < self.margin:
+                document.showPage()
+                y = height - self.margin
+            document.setFont(self.font_name, self.font_size)
+            document.drawString(self.margin, y, line)
+            y -= self.font_size * 1.5
+        document.save()
+        return buffer.getvalue()
+
+    def stream(self, ingredients):
+        yield self.build(
+            [TITLE] + ['{} - {} {}.'.format(*item) for item in ingredients]
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return self.build(self.error_text(data).splitlines())
+
+
+EXPORTERS = (TextExporter, CSVExporter, JSONExporter, PDFExporter)
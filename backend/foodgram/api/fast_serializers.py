@@ -0,0 +1,106 @@
+"""Сериализаторы только для чтения без ModelSerializer.
+
+Собирают словари ответа напрямую из объектов с аннотациями
+и prefetch из RecipeQuerySet.for_feed и вьюсета подписок.
+Формат ответа совпадает с RecipeGETSerializer и SubscriptionsGETSerializer
+(docs/openapi-schema.yml). Включаются настройкой FAST_SERIALIZERS.
+"""
+from .fields import default_rendition, image_srcset, image_url
+
+
+def user_data(user, is_subscribed):
+    return {
+        'id': user.id,
+        'email': user.email,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_subscribed': is_subscribed,
+    }
+
+
+def tag_data(tag):
+    return {
+        'id': tag.id,
+        'name': tag.name,
+        'color': tag.color,
+        'slug': tag.slug,
+    }
+
+
+def ingredient_data(line):
+    ingredient = line.ingredient
+    return {
+        'id': ingredient.id,
+        'name': ingredient.name,
+        'measurement_unit': ingredient.measurement_unit,
+        'amount': line.amount,
+        'recipe': line.recipe_id,
+        'ingredient': line.ingredient_id,
+    }
+
+
+class FastSerializer:
+    """Минимальный интерфейс сериализатора DRF для вьюсетов."""
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    def to_representation(self, instance):
+        raise NotImplementedError
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(item) for item in self.instance]
+        return self.to_representation(self.instance)
+
+
+class FastRecipeSerializer(FastSerializer):
+    """Рецепт из RecipeQuerySet.for_feed."""
+
+    def to_representation(self, recipe):
+        request = self.context.get('request')
+        return {
+            'id': recipe.id,
+            'tags': [tag_data(tag) for tag in recipe.tags.all()],
+            'author': user_data(recipe.author, recipe.author_is_subscribed),
+            'ingredients': [
+                ingredient_data(line) for line in recipe.ingredient_list.all()
+            ],
+            'is_favorited': recipe.is_favorited,
+            'is_in_shopping_cart': recipe.is_in_shopping_cart,
+            'name': recipe.name,
+            'image': image_url(
+                recipe, default_rendition(self.context.get('view')), request
+            ),
+            'image_srcset': image_srcset(recipe, request),
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+        }
+
+
+class FastSubscriptionsSerializer(FastSerializer):
+    """Автор из выборки подписок с рецептами из context['recipes']."""
+
+    def recipe_data(self, recipe):
+        request = self.context.get('request')
+        return {
+            'id': recipe.id,
+            'name': recipe.name,
+            'image': image_url(recipe, 'thumbnail', request),
+            'image_srcset': image_srcset(recipe, request),
+            'cooking_time': recipe.cooking_time,
+        }
+
+    def to_representation(self, author):
+        return {
+            **user_data(author, author.is_subscribed),
+            'recipes': [
+                self.recipe_data(recipe)
+                for recipe in self.context['recipes'][author.id]
+            ],
+            'recipes_count': author.recipes_count,
+        }
@@ -0,0 +1,103 @@
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+from recipes import images
+
+
+def media_prefix(request):
+    """Абсолютный адрес каталога медиафайлов для запроса.
+
+    Считается один раз на запрос и запоминается в нём. Для хранилищ,
+    адрес файла в которых не сводится к base_url + имя (S3 с подписью
+    и т.п.), возвращает None.
+    """
+    if not isinstance(default_storage, FileSystemStorage):
+        return None
+    prefix = getattr(request, 'media_prefix', None)
+    if prefix is None:
+        prefix = default_storage.base_url
+        if request is not None:
+            prefix = request.build_absolute_uri(prefix)
+            request.media_prefix = prefix
+    return prefix
+
+
+def media_url(path, request):
+    prefix = media_prefix(request)
+    if prefix is not None:
+        return prefix + filepath_to_uri(path).lstrip('/')
+    url = default_storage.url(path)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def image_url(recipe, rendition, request):
+    """Ссылка на копию картинки рецепта, на ближайшую меньшую копию,
+    если оригинал меньше запрошенной, или на оригинал."""
+    if not recipe.image:
+        return None
+    names = list(images.RENDITIONS)
+    for name in reversed(names[:names.index(rendition) + 1]):
+        if name in recipe.image_renditions:
+            return media_url(recipe.image_renditions[name]['jpeg'], request)
+    return media_url(recipe.image.name, request)
+
+
+def image_srcset(recipe, request):
+    """Копии картинки рецепта в WebP в формате атрибута srcset,
+    по одной на ширину."""
+    sources = {}
+    for name in images.RENDITIONS:
+        rendition = recipe.image_renditions.get(name)
+        if rendition is not None:
+            sources.setdefault(rendition['width'], rendition['webp'])
+    return ', '.join(
+        f'{media_url(path, request)} {width}w'
+        for width, path in sources.items()
+    ) or None
+
+
+# Действия вьюсетов, которые отдают списки рецептов.
+LIST_ACTIONS = ('list', 'feed')
+
+
+def default_rendition(view):
+    """В списках уменьшенная копия, в остальных действиях — средняя."""
+    if getattr(view, 'action', None) in LIST_ACTIONS:
+        return 'thumbnail'
+    return 'medium'
+
+
+class RecipeImageField(serializers.Field):
+    """Ссылка на копию картинки рецепта.
+
+    Без явного rendition копия выбирается по действию вьюсета.
+    Пока копии не построены, отдаётся загруженный оригинал.
+    """
+
+    def __init__(self, rendition=None, **kwargs):
+        self.rendition = rendition
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return image_url(
+            recipe,
+            self.rendition or default_rendition(self.context.get('view')),
+            self.context.get('request'),
+        )
+
+
+class RecipeImageSrcsetField(serializers.Field):
+    """Поле со srcset картинки рецепта."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return image_srcset(recipe, self.context.get('request'))
@@ -1,36 +1,120 @@
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
 
-from recipes.models import Recipe, Tag, Ingredient
+from recipes.models import RECIPE_ORDERINGS, Recipe, Tag
+from recipes.search import ingredient_index, rank
+from recipes.versions import get_version
 from users.models import User
 
+from .pagination import KeysetPagination
 
-class IngredientSearch(SearchFilter):
-    """Фильтр для поиска ингредиента в создании рецепта."""
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+class IngredientSearch(BaseFilterBackend):
+    """Фильтр для поиска ингредиента в создании рецепта.
+
+    Возвращает не больше limit ингредиентов, совпадающие по началу
+    названия идут первыми. Если совпадений по началу хватает, ответ
+    строится по индексу в памяти без запроса к базе.
+    """
     search_param = 'name'
+    limit_param = 'limit'
 
-    class Meta:
-        model = Ingredient
-        fields = ('name',)
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_param])
+        except (KeyError, ValueError):
+            return SEARCH_LIMIT
+        return min(max(limit, 1), MAX_SEARCH_LIMIT)
+
+    def filter_queryset(self, request, queryset, view):
+        name = request.query_params.get(self.search_param, '').strip()
+        if not name or view.action != 'list':
+            return queryset
+        limit = self.get_limit(request)
+        matches = ingredient_index.prefix(name)
+        if len(matches) >= limit:
+            return rank(matches, name, limit)
+        return queryset.search(name, limit)
+
+
+def tag_ids_by_slug():
+    """Соответствие slug -> id тегов, кешируется до изменения тегов."""
+    return cache.get_or_set(
+        f'tag_ids_by_slug:{get_version("tag")}',
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+        None
+    )
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_ids_by_slug()]
 
 
 class RecipeFilter(FilterSet):
     """Фильтр для рецептов."""
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all()
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='filter_tags'
     )
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=[(name, name) for name in RECIPE_ORDERINGS],
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author',)
 
+    def filter_tags(self, queryset, name, value):
+        """Рецепты хотя бы с одним из тегов без JOIN и DISTINCT."""
+        tag_ids = tag_ids_by_slug()
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'),
+                tag__in=[tag_ids[slug] for slug in value if slug in tag_ids]
+            )
+        ))
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию, порядок
+        по релевантности, если не задан ordering.
+
+        Курсор хранит позицию только для порядков из RECIPE_ORDERINGS,
+        поэтому cursor без ordering вместе с поиском не принимается.
+        """
+        value = value.strip()
+        if not value:
+            return queryset
+        if (
+            KeysetPagination.cursor_query_param in self.data
+            and not self.data.get('ordering')
+        ):
+            raise ValidationError(
+                {'cursor': 'С поиском курсор доступен только с ordering.'}
+            )
+        return queryset.search(value)
+
+    def filter_ordering(self, queryset, name, value):
+        """Сортировка: new (по умолчанию), popular — по числу добавлений
+        в избранное, trending — по рейтингу из RecipeScore.
+
+        Добавление в избранное не сбрасывает кеш ленты, поэтому порядок
+        popular отстаёт не больше чем на CachedRecipeListMixin.cache_timeout.
+        """
+        return queryset.ordered(value)
+
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and not user.is_anonymous:
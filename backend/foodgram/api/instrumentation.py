@@ -0,0 +1,182 @@
+"""Замеры запросов к API без DEBUG.
+
+Middleware считает для каждого запроса число SQL-запросов и время в базе
+(через connection.execute_wrapper), время сериализации и общее время,
+отдаёт их в заголовке Server-Timing и пишет строкой в лог с уровнем
+INFO (по умолчанию выключен, включается REQUEST_LOG_LEVEL=INFO). Последние
+замеры хранятся в памяти процесса по имени вью (RecipeViewSet.list
+и т.п.) для перцентилей в /api/stats/, там же отдаются счётчики.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+from .benchmarks import percentile
+
+logger = logging.getLogger(__name__)
+
+SAMPLES_PER_VIEW = 1000
+
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.timings = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.timings['db'] += time.perf_counter() - started
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def timed(name):
+    """Добавляет время блока к замеру name текущего запроса."""
+    metrics = current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.timings[name] += time.perf_counter() - started
+
+
+class TimedSerializer:
+    """Обёртка сериализатора, которая замеряет получение data."""
+
+    def __init__(self, serializer):
+        self.__dict__['serializer'] = serializer
+
+    def __getattr__(self, name):
+        return getattr(self.serializer, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.serializer, name, value)
+
+    @property
+    def data(self):
+        with timed('serializer'):
+            return self.serializer.data
+
+
+class ViewStats:
+    """Последние замеры по именам вью в памяти процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(
+            lambda: deque(maxlen=SAMPLES_PER_VIEW)
+        )
+
+    def add(self, view, total, db, serializer, queries):
+        with self.lock:
+            self.samples[view].append((total, db, serializer, queries))
+
+    def summary(self):
+        with self.lock:
+            samples = {view: list(rows) for view, rows in self.samples.items()}
+        result = {}
+        for view, rows in sorted(samples.items()):
+            total, db, serializer, queries = zip(*rows)
+            result[view] = {
+                'requests': len(rows),
+                'total_ms': {
+                    'p50': round(percentile(total, 0.5), 2),
+                    'p95': round(percentile(total, 0.95), 2),
+                    'p99': round(percentile(total, 0.99), 2),
+                },
+                'db_ms_p50': round(percentile(db, 0.5), 2),
+                'serializer_ms_p50': round(percentile(serializer, 0.5), 2),
+                'queries_p50': percentile(queries, 0.5),
+                'queries_max': max(queries),
+            }
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+view_stats = ViewStats()
+
+
+class Counters:
+    """Счётчики событий в памяти процесса (попадания в кеши и т.п.)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = Counter()
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.values[name] += value
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+
+counters = Counters()
+
+
+def view_name(request):
+    """Имя вью вида RecipeViewSet.list или имя маршрута."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    cls = getattr(match.func, 'cls', None)
+    if cls is None:
+        return match.view_name or match._func_path
+    action = getattr(match.func, 'actions', {}).get(request.method.lower())
+    return f'{cls.__name__}.{action or request.method.lower()}'
+
+
+class InstrumentationMiddleware:
+    """Замеры запроса: Server-Timing, строка лога и статистика по вью."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        total = metrics.total() * 1000
+        db = metrics.timings['db'] * 1000
+        serializer = metrics.timings['serializer'] * 1000
+        view = view_name(request)
+        view_stats.add(view, total, db, serializer, metrics.queries)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={db:.2f};desc="{metrics.queries} queries"',
+            f'serializer;dur={serializer:.2f}',
+            f'total;dur={total:.2f}',
+        ))
+        logger.info(
+            'view=%s method=%s path=%s status=%s total_ms=%.2f db_ms=%.2f '
+            'queries=%s serializer_ms=%.2f',
+            view, request.method, request.path, response.status_code,
+            total, db, metrics.queries, serializer,
+        )
+        return response
@@ -0,0 +1,141 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+from recipes.models import Recipe
+from recipes.versions import get_version
+
+from .instrumentation import TimedSerializer
+
+
+def query_string(request):
+    """Параметры запроса в стабильном порядке для ключей кеша,
+    без пробелов и не-ASCII символов."""
+    return urlencode([
+        (key, value)
+        for key, values in sorted(request.query_params.lists())
+        for value in sorted(values)
+    ])
+
+
+class SerializerTimingMixin:
+    """Замер времени сериализации для InstrumentationMiddleware."""
+
+    def get_serializer(self, *args, **kwargs):
+        return TimedSerializer(super().get_serializer(*args, **kwargs))
+
+
+class CachedListMixin:
+    """Кеширование ответа list для справочников.
+
+    Готовые данные ответа хранятся в кеше под ключом с версией модели
+    и параметрами запроса. ETag построен на том же ключе, поэтому
+    клиенты и nginx получают 304, пока справочник не изменится.
+    """
+    cache_version = None
+    cache_timeout = 60 * 60
+    cache_max_age = 60
+
+    def get_list_cache_key(self, request):
+        return 'list:{}:{}:{}'.format(
+            self.basename,
+            get_version(self.cache_version),
+            query_string(request)
+        )
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_list_cache_key(request)
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            data = cache.get(key)
+            if data is None:
+                data = super().list(request, *args, **kwargs).data
+                cache.set(key, data, self.cache_timeout)
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=self.cache_max_age)
+        return response
+
+
+class CachedRecipeListMixin:
+    """Кеширование ленты рецептов.
+
+    Общая часть ответа — страница рецептов, как её видит анонимный
+    пользователь — хранится один раз на набор параметров. Поверх неё
+    для авторизованного пользователя накладываются его флаги
+    is_favorited, is_in_shopping_cart и is_subscribed, которые кешируются
+    отдельно под версией его избранного, корзины и подписок.
+
+    Добавление в избранное версию ленты не меняет, поэтому порядок
+    ?ordering=popular обновляется по истечении cache_timeout.
+
+    Ссылки next, previous и адреса картинок в странице абсолютные,
+    поэтому страница кешируется отдельно для каждого адреса сайта.
+    """
+    user_filters = ('is_favorited', 'is_in_shopping_cart')
+    cache_timeout = 5 * 60
+
+    def list(self, request, *args, **kwargs):
+        user = request.user
+        if user.is_authenticated and any(
+            request.query_params.get(name) for name in self.user_filters
+        ):
+            return super().list(request, *args, **kwargs)
+        params = query_string(request)
+        version = get_version('recipe')
+        key = f'recipes:{version}:{request.build_absolute_uri("/")}:{params}'
+        data = cache.get(key)
+        if data is None:
+            data = self.get_shared_page()
+            cache.set(key, data, self.cache_timeout)
+        if user.is_authenticated:
+            data = self.apply_user_flags(
+                data,
+                self.get_user_flags(
+                    user, data, f'recipes:{version}:{user.pk}:'
+                    f'{get_version(f"user_flags:{user.pk}")}:{params}'
+                )
+            )
+        return Response(data)
+
+    def get_shared_page(self):
+        queryset = self.filter_queryset(
+            Recipe.objects.for_feed(AnonymousUser())
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data).data
+
+    def get_user_flags(self, user, data, key):
+        flags = cache.get(key)
+        if flags is None:
+            flags = {
+                pk: rest for pk, *rest in Recipe.objects.filter(
+                    pk__in=[recipe['id'] for recipe in data['results']]
+                ).with_user_flags(user).values_list(
+                    'pk', 'is_favorited', 'is_in_shopping_cart',
+                    'author_is_subscribed'
+                )
+            }
+            cache.set(key, flags, self.cache_timeout)
+        return flags
+
+    def apply_user_flags(self, data, flags):
+        results = []
+        for recipe in data['results']:
+            is_favorited, is_in_shopping_cart, is_subscribed = flags.get(
+                recipe['id'], (False, False, False)
+            )
+            results.append({
+                **recipe,
+                'author': {**recipe['author'], 'is_subscribed': is_subscribed},
+                'is_favorited': is_favorited,
+                'is_in_shopping_cart': is_in_shopping_cart,
+            })
+        return {**data, 'results': results}
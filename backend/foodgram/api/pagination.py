@@ -1,5 +1,209 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.models import RECIPE_ORDERINGS
+
+COUNT_CACHE_TIMEOUT = 60
+
+
+def approximate_count(queryset):
+    """Примерное число строк выборки.
+
+    Для выборки без условий на PostgreSQL берётся оценка планировщика
+    из pg_class, иначе точный COUNT(*) кешируется на минуту.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    key = 'count:' + hashlib.md5(str(queryset.query).encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, COUNT_CACHE_TIMEOUT)
+
+
+def field_value(obj, path):
+    """Значение поля по пути вида score__trending."""
+    for name in path.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def model_field(model, path):
+    """Поле модели по пути вида score__trending."""
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по курсору без OFFSET и COUNT(*).
+
+    Курсор хранит значения полей ordering у крайней записи страницы,
+    следующая страница выбирается условием «после этой записи», поэтому
+    новые записи не сдвигают уже выданные страницы.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор.'
+    max_page_size = 100
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+        self.page_size = api_settings.PAGE_SIZE
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, obj, reverse):
+        position = [
+            str(field_value(obj, field.lstrip('-')))
+            for field in self.ordering
+        ]
+        token = json.dumps({'p': position, 'r': reverse})
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            base64.urlsafe_b64encode(token.encode()).decode()
+        )
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode()))
+            position = [
+                model_field(model, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, data['p'], strict=True)
+            ]
+            return position, bool(data['r'])
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def position_filter(self, position, reverse):
+        """Условие «строго после position» в порядке ordering."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+        self.count = None
+        if request.query_params.get(self.count_query_param):
+            self.count = approximate_count(queryset)
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            ]
+        if position is not None:
+            queryset = queryset.filter(
+                self.position_filter(position, reverse)
+            )
+        page = list(queryset.order_by(*ordering)[:size + 1])
+        has_more = len(page) > size
+        page = page[:size]
+        if reverse:
+            page.reverse()
+        self.next_url = self.previous_url = None
+        if page:
+            if has_more or reverse:
+                self.next_url = self.encode_cursor(page[-1], False)
+            if position is not None and (has_more or not reverse):
+                self.previous_url = self.encode_cursor(page[0], True)
+        elif position is not None:
+            self.previous_url = replace_query_param(
+                self.base_url, self.cursor_query_param, ''
+            )
+        return page
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.next_url,
+            'previous': self.previous_url,
+            'results': data,
+        }
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+
+class RecipeFeedPagination(KeysetPagination):
+    """Пагинация ленты подписок по дате публикации, всегда по курсору."""
+
+    def __init__(self):
+        super().__init__(RECIPE_ORDERINGS['new'])
 
 
 class CustomPageNumberPagination(PageNumberPagination):
+    """Постраничная пагинация с переходом на курсор по запросу.
+
+    Если у класса задан keyset_ordering и в запросе есть параметр cursor
+    (для первой страницы — пустой), используется KeysetPagination.
+    """
     page_size_query_param = 'limit'
+    keyset_ordering = None
+
+    def get_keyset_ordering(self, request):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        ordering = self.get_keyset_ordering(request)
+        if (
+            ordering
+            and KeysetPagination.cursor_query_param in request.query_params
+        ):
+            self.keyset = KeysetPagination(ordering)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class RecipePagination(CustomPageNumberPagination):
+    """Пагинация ленты в порядке из параметра ordering."""
+    ordering_query_param = 'ordering'
+
+    def get_keyset_ordering(self, request):
+        return RECIPE_ORDERINGS.get(
+            request.query_params.get(self.ordering_query_param),
+            RECIPE_ORDERINGS['new']
+        )
+
+
+class SubscriptionsPagination(CustomPageNumberPagination):
+    keyset_ordering = ('id',)
@@ -1,15 +1,21 @@
 from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions as django_exceptions
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers, validators, exceptions
 
+from recipes import images
 from recipes.models import (
     FavoriteRecipe, Ingredient, Recipe,
     RecipeIngredient, ShoppingCart, Tag
 )
+from recipes.shopping_lists import update_shopping_cart
 from users.models import User
 
+from .fields import RecipeImageField, RecipeImageSrcsetField
+from .utils import get_recipes_limit
+
 FIELDS_USER = (
     'id',
     'email',
@@ -29,6 +35,8 @@ class UserGETSerializer(UserSerializer):
         read_only_fields = ('is_subscribed',)
 
     def get_is_subscribed(self, author):
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
         request = self.context.get('request')
         return (
             request and request.user.is_authenticated
@@ -86,17 +94,18 @@ class SetPasswordSerializer(serializers.Serializer):
                 {'new_password': 'Новый пароль должен отличаться от текущего.'}
             )
         instance.set_password(validated_data['new_password'])
-        instance.save()
+        instance.save(update_fields=('password',))
         return validated_data
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для рецептов без поля ингредиет."""
-    image = Base64ImageField(read_only=True)
+    image = RecipeImageField('thumbnail')
+    image_srcset = RecipeImageSrcsetField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_srcset', 'cooking_time')
         read_only_fields = fields
 
 
@@ -116,6 +125,8 @@ class SubscriptionsGETSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, author):
         """Проверка подписки пользователей."""
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
         request = self.context.get('request')
         return (
             request and request.user.is_authenticated
@@ -123,16 +134,21 @@ class SubscriptionsGETSerializer(serializers.ModelSerializer):
         )
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes[:int(limit)]
-        serializer = RecipeSerializer(recipes, many=True, read_only=True)
+        if 'recipes' in self.context:
+            recipes = self.context['recipes'][obj.id]
+        else:
+            request = self.context.get('request')
+            limit = get_recipes_limit(request)
+            recipes = obj.recipes.all()
+            if limit:
+                recipes = recipes[:int(limit)]
+        serializer = RecipeSerializer(
+            recipes, many=True, read_only=True, context=self.context
+        )
         return serializer.data
 
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
 
 class SubscriptionsPOSTSerializer(serializers.ModelSerializer):
@@ -169,7 +185,7 @@ class SubscriptionsPOSTSerializer(serializers.ModelSerializer):
         )
 
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -206,7 +222,8 @@ class RecipeGETSerializer(serializers.ModelSerializer):
         many=True, read_only=True, source='ingredient_list'
     )
     tags = TagSerializer(many=True, read_only=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
+    image_srcset = RecipeImageSrcsetField()
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
 
@@ -215,10 +232,17 @@ class RecipeGETSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'tags', 'author', 'ingredients',
             'is_favorited', 'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time'
+            'name', 'image', 'image_srcset', 'text', 'cooking_time'
         )
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return (
             self.context.get('request').user.is_authenticated
             and FavoriteRecipe.objects.filter(
@@ -227,6 +251,8 @@ class RecipeGETSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return (
             self.context.get('request').user.is_authenticated
             and ShoppingCart.objects.filter(
@@ -297,30 +323,75 @@ class RecipePOSTserializer(serializers.ModelSerializer):
                 )
         return obj
 
-    def tags_ingredients_set(self, recipe, tags, ingredients):
-        recipe.tags.set(tags)
-        RecipeIngredient.objects.bulk_create(
-            [
-                RecipeIngredient(
-                    recipe=recipe,
-                    ingredient=Ingredient.objects.get(pk=ingredient['id']),
-                    amount=ingredient['amount']
+    def validate_ingredients(self, ingredients):
+        ids = [ingredient['id'] for ingredient in ingredients]
+        missing = set(ids) - set(Ingredient.objects.in_bulk(ids))
+        if missing:
+            raise exceptions.ValidationError(
+                'Нет ингредиентов с id: {}'.format(
+                    ', '.join(map(str, sorted(missing)))
                 )
-                for ingredient in ingredients
-            ]
+            )
+        return ingredients
+
+    def set_ingredients(self, recipe, ingredients):
+        """Изменяет только отличающиеся строки ингредиентов рецепта.
+
+        Возвращает изменение количества по id ингредиентов для списков
+        покупок; удалённые строки учитывает сигнал pre_delete.
+        """
+        new = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        old = {
+            line.ingredient_id: line
+            for line in RecipeIngredient.objects.filter(recipe=recipe)
+        }
+        changed = []
+        removed = []
+        amounts = {}
+        for ingredient_id, line in old.items():
+            amount = new.get(ingredient_id, 0)
+            if not amount:
+                removed.append(line.pk)
+            elif amount != line.amount:
+                amounts[ingredient_id] = amount - line.amount
+                line.amount = amount
+                changed.append(line)
+        RecipeIngredient.objects.filter(pk__in=removed).delete()
+        RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        created = [
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in new.items()
+            if ingredient_id not in old
+        ]
+        RecipeIngredient.objects.bulk_create(created)
+        amounts.update(
+            (line.ingredient_id, line.amount) for line in created
         )
+        return amounts
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(
             author=self.context['request'].user, **validated_data
         )
-        self.tags_ingredients_set(recipe, tags, ingredients)
+        recipe.tags.set(tags)
+        self.set_ingredients(recipe, ingredients)
+        images.schedule(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.image = validated_data.get('image', instance.image)
+        if 'image' in validated_data:
+            instance.image = validated_data['image']
+            instance.image_renditions = {}
+            images.schedule(instance)
         instance.name = validated_data.get('name', instance.name)
         instance.text = validated_data.get('text', instance.text)
         instance.cooking_time = validated_data.get(
@@ -328,15 +399,18 @@ class RecipePOSTserializer(serializers.ModelSerializer):
         )
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
-        RecipeIngredient.objects.filter(
-            recipe=instance,
-            ingredient__in=instance.ingredients.all()
-        ).delete()
-        self.tags_ingredients_set(instance, tags, ingredients)
+        instance.tags.set(tags)
+        amounts = self.set_ingredients(instance, ingredients)
         instance.save()
+        update_shopping_cart(
+            instance.shopping_recipe.values_list('user', flat=True), amounts
+        )
         return instance
 
     def to_representation(self, instance):
+        instance = Recipe.objects.for_feed(
+            self.context['request'].user
+        ).get(pk=instance.pk)
         return RecipeGETSerializer(instance, context=self.context).data
 
 
@@ -0,0 +1,767 @@
+import base64
+from datetime import timedelta
+from io import StringIO
+
+import yaml
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import OutputWrapper
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.benchmarks import (
+    SCENARIOS, measure, scenario_context, scenario_data, scenario_path,
+    summarize, write_report
+)
+from recipes import counters
+from recipes.models import (
+    RECIPE_ORDERINGS, FavoriteRecipe, Ingredient, Recipe, RecipeIngredient,
+    RecipeScore, ShoppingCart, ShoppingListItem, Tag
+)
+from recipes.versions import get_version
+from users.models import Subscribe, User
+
+RECIPES_URL = '/api/recipes/'
+SUBSCRIPTIONS_URL = '/api/users/subscriptions/'
+SCHEMA_PATH = settings.BASE_DIR.parent.parent / 'docs' / 'openapi-schema.yml'
+SCHEMA_TYPES = {
+    'integer': int,
+    'string': str,
+    'boolean': bool,
+    'array': list,
+    'object': dict,
+}
+
+
+class FeedTestCase(TestCase):
+    """Два автора, теги, ингредиенты и по шесть рецептов у каждого."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.org',
+            first_name='Читатель', last_name='Первый', password='pass12345!'
+        )
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.org',
+            first_name='Автор', last_name='Второй', password='pass12345!'
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {i}', color=f'#00000{i}', slug=f'tag{i}'
+            )
+            for i in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {i}', measurement_unit='г'
+            )
+            for i in range(4)
+        ]
+        cls.recipes = []
+        for i in range(12):
+            recipe = Recipe.objects.create(
+                author=(cls.author, cls.user)[i % 2],
+                name=f'Рецепт {i}',
+                text='Описание',
+                cooking_time=i + 1,
+                image='recipes/images/test.jpg',
+            )
+            recipe.tags.set(tags[:i % 3 + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=j + 1
+                )
+                for j, ingredient in enumerate(ingredients[:i % 4 + 1])
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.guest = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class RecipeListQueriesTest(FeedTestCase):
+    """Число запросов ленты не зависит от размера страницы."""
+
+    def assert_list_queries(self, client, count):
+        for limit in (2, 10):
+            cache.clear()
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(count):
+                    response = client.get(RECIPES_URL, {'limit': limit})
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_guest(self):
+        self.assert_list_queries(self.guest, 4)
+
+    def test_authenticated(self):
+        self.assert_list_queries(self.client, 5)
+
+    def test_cached(self):
+        for client in (self.guest, self.client):
+            client.get(RECIPES_URL, {'limit': 10})
+            with self.assertNumQueries(0):
+                client.get(RECIPES_URL, {'limit': 10})
+
+
+class SubscriptionFeedTest(FeedTestCase):
+    """Лента подписок: только авторы из подписок, новые первыми."""
+    url = f'{RECIPES_URL}feed/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        stranger = User.objects.create_user(
+            username='stranger', email='stranger@example.org',
+            password='pass12345!'
+        )
+        Recipe.objects.create(
+            author=stranger, name='Чужой рецепт', text='Описание',
+            cooking_time=5, image='recipes/images/test.jpg'
+        )
+        Subscribe.objects.create(user=cls.user, author=cls.author)
+        now = timezone.now()
+        for i, recipe in enumerate(cls.recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(hours=(i * 5) % 12)
+            )
+
+    def test_followed_authors_newest_first(self):
+        expected = list(
+            Recipe.objects.filter(author=self.author).order_by(
+                '-pub_date', 'id'
+            ).values_list('pk', flat=True)
+        )
+        ids = []
+        url = f'{self.url}?limit=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+        self.assertNotEqual(expected, sorted(expected, reverse=True))
+
+    def test_without_subscriptions(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+    def test_anonymous(self):
+        self.assertEqual(self.guest.get(self.url).status_code, 401)
+
+
+class RecipeFeedCacheTest(FeedTestCase):
+    """Флаги пользователя поверх закешированной ленты."""
+
+    def get_recipe(self, client, **params):
+        response = client.get(RECIPES_URL, {'limit': 20, **params})
+        self.assertEqual(response.status_code, 200)
+        return next(
+            (
+                recipe for recipe in response.data['results']
+                if recipe['id'] == self.recipes[0].id
+            ),
+            None
+        )
+
+    def assert_flag_follows(self, url, flag):
+        self.assertFalse(flag(self.get_recipe(self.client)))
+        for method, status, expected in (
+            ('post', 201, True), ('delete', 204, False)
+        ):
+            with self.subTest(method=method):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = getattr(self.client, method)(url)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(
+                    flag(self.get_recipe(self.client)), expected
+                )
+                self.assertFalse(flag(self.get_recipe(self.guest)))
+
+    def test_favorite(self):
+        self.assert_flag_follows(
+            f'{RECIPES_URL}{self.recipes[0].id}/favorite/',
+            lambda recipe: recipe['is_favorited']
+        )
+
+    def test_shopping_cart(self):
+        self.assert_flag_follows(
+            f'{RECIPES_URL}{self.recipes[0].id}/shopping_cart/',
+            lambda recipe: recipe['is_in_shopping_cart']
+        )
+
+    def test_subscribe(self):
+        self.assert_flag_follows(
+            f'/api/users/{self.author.id}/subscribe/',
+            lambda recipe: recipe['author']['is_subscribed']
+        )
+
+    def test_user_filter_skips_cache(self):
+        self.assertIsNone(self.get_recipe(self.client, is_favorited=1))
+        FavoriteRecipe.objects.create(user=self.user, recipe=self.recipes[0])
+        self.assertIsNotNone(self.get_recipe(self.client, is_favorited=1))
+
+    def assert_bumps(self, expected, save):
+        version = get_version('recipe')
+        with self.captureOnCommitCallbacks(execute=True):
+            save()
+        self.assertEqual(get_version('recipe') != version, expected)
+
+    def test_user_save(self):
+        author = User.objects.get(pk=self.author.pk)
+        self.assert_bumps(False, lambda: User.objects.create_user(
+            username='new', email='new@example.org', password='pass12345!'
+        ))
+        author.last_login = timezone.now()
+        self.assert_bumps(False, lambda: author.save(
+            update_fields=['last_login']
+        ))
+        self.assert_bumps(False, author.save)
+        author.first_name = 'Другой'
+        self.assert_bumps(True, author.save)
+        newcomer = User.objects.get(username='new')
+        newcomer.first_name = 'Новый'
+        self.assert_bumps(False, newcomer.save)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'mirror.example.org'])
+    def test_links_follow_host(self):
+        for host in ('testserver', 'mirror.example.org'):
+            with self.subTest(host=host):
+                response = self.guest.get(
+                    RECIPES_URL, {'limit': 5}, HTTP_HOST=host
+                )
+                self.assertTrue(
+                    response.data['next'].startswith(f'http://{host}/')
+                )
+                self.assertTrue(
+                    response.data['results'][0]['image'].startswith(
+                        f'http://{host}/'
+                    )
+                )
+
+
+class FastSerializersTest(FeedTestCase):
+    """Ответы DRF и быстрых сериализаторов совпадают и соответствуют
+    docs/openapi-schema.yml."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with open(SCHEMA_PATH, encoding='utf-8') as file:
+            cls.schema = yaml.safe_load(file)
+        recipe = cls.recipes[0]
+        recipe.image_renditions = {
+            'original': {'width': 2000, 'height': 1500},
+            **{
+                name: {
+                    'width': width,
+                    'height': width * 3 // 4,
+                    'jpeg': f'recipes/renditions/{recipe.id}/{name}.jpeg',
+                    'webp': f'recipes/renditions/{recipe.id}/{name}.webp',
+                }
+                for name, width in (('thumbnail', 480), ('medium', 1200))
+            },
+        }
+        recipe.save()
+        Subscribe.objects.create(user=cls.user, author=cls.author)
+        FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[2])
+        for counter in counters.COUNTERS:
+            counters.recount(*counter)
+
+    def resolve(self, schema):
+        if '$ref' not in schema:
+            return schema
+        node = self.schema
+        for part in schema['$ref'].lstrip('#/').split('/'):
+            node = node[part]
+        return node
+
+    def assert_matches_schema(self, data, schema, path='$'):
+        schema = self.resolve(schema)
+        if data is None:
+            self.assertTrue(schema.get('nullable'), path)
+            return
+        self.assertIs(type(data), SCHEMA_TYPES[schema['type']], path)
+        if schema['type'] == 'object':
+            for name, field in schema['properties'].items():
+                self.assertIn(name, data, path)
+                self.assert_matches_schema(
+                    data[name], field, f'{path}.{name}'
+                )
+        elif schema['type'] == 'array':
+            for index, item in enumerate(data):
+                self.assert_matches_schema(
+                    item, schema['items'], f'{path}[{index}]'
+                )
+
+    def render(self, url, params):
+        responses = []
+        for fast in (False, True):
+            cache.clear()
+            with override_settings(FAST_SERIALIZERS=fast):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            responses.append(response.json())
+        return responses
+
+    def assert_golden(self, url, params):
+        drf, fast = self.render(url, params)
+        self.assertEqual(drf, fast)
+        self.assert_matches_schema(
+            drf,
+            self.schema['paths'][url]['get']['responses']['200']['content'][
+                'application/json'
+            ]['schema']
+        )
+        return drf
+
+    def test_recipes(self):
+        data = self.assert_golden(RECIPES_URL, {'limit': 20})
+        recipe = next(
+            item for item in data['results']
+            if item['id'] == self.recipes[0].id
+        )
+        self.assertTrue(recipe['is_favorited'])
+        self.assertTrue(recipe['author']['is_subscribed'])
+        self.assertIn('thumbnail.jpeg', recipe['image'])
+        self.assertIn('thumbnail.webp 480w', recipe['image_srcset'])
+
+    def test_subscriptions(self):
+        data = self.assert_golden(SUBSCRIPTIONS_URL, {'recipes_limit': 6})
+        recipes = data['results'][0]['recipes']
+        self.assertEqual(len(recipes), 6)
+        self.assertEqual(data['results'][0]['recipes_count'], 6)
+        self.assertTrue(any(recipe['image_srcset'] for recipe in recipes))
+
+
+class ExplainQueriesTest(FeedTestCase):
+    """Команда explain_queries строит все запросы ленты."""
+
+    def test_explain_queries(self):
+        FavoriteRecipe.objects.create(user=self.user, recipe=self.recipes[0])
+        Recipe.objects.filter(pk=self.recipes[1].pk).update(
+            name='Пирог с капустой'
+        )
+        stdout = StringIO()
+        call_command('explain_queries', stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn('== поиск', output)
+        self.assertNotIn('Пустая выборка', output)
+        self.assertIn('Все запросы используют индексы.', output)
+
+
+class RecipeSearchTest(FeedTestCase):
+    """Поиск по рецептам и курсорная пагинация."""
+
+    def test_cursor_requires_ordering(self):
+        response = self.guest.get(
+            RECIPES_URL, {'search': 'Рецепт', 'cursor': ''}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.data)
+        response = self.guest.get(
+            RECIPES_URL,
+            {'search': 'Рецепт', 'cursor': '', 'ordering': 'popular'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class TagFilterTest(FeedTestCase):
+    """Фильтр по тегам через закешированное соответствие slug -> id."""
+
+    def get_ids(self, *slugs):
+        response = self.guest.get(RECIPES_URL, {'limit': 20, 'tags': slugs})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def expected_ids(self, *slugs):
+        return sorted(
+            recipe.id for recipe in self.recipes
+            if recipe.tags.filter(slug__in=slugs).exists()
+        )
+
+    def test_any_of_tags(self):
+        for slugs in (('tag0',), ('tag2',), ('tag1', 'tag2')):
+            with self.subTest(slugs=slugs):
+                ids = self.get_ids(*slugs)
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(sorted(ids), self.expected_ids(*slugs))
+        self.assertEqual(len(self.get_ids('tag1', 'tag2')), 8)
+
+    def test_unknown_slug(self):
+        for slugs in (['missing'], ['tag0', 'missing']):
+            with self.subTest(slugs=slugs):
+                response = self.guest.get(RECIPES_URL, {'tags': slugs})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('tags', response.data)
+
+    def test_tag_change_invalidates_map(self):
+        expected = self.get_ids('tag2')
+        tag = Tag.objects.get(slug='tag2')
+        tag.slug = 'desserts'
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.save()
+        self.assertEqual(
+            self.guest.get(RECIPES_URL, {'tags': 'tag2'}).status_code, 400
+        )
+        self.assertEqual(self.get_ids('desserts'), expected)
+
+
+class ShoppingListTest(FeedTestCase):
+    """Сводный список покупок совпадает с корзинами после каждой записи."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for recipe in cls.recipes[:6]:
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        for recipe in cls.recipes[1:4]:
+            ShoppingCart.objects.create(user=cls.author, recipe=recipe)
+
+    def assert_lists_match(self):
+        self.assertTrue(ShoppingListItem.objects.exists())
+        self.assertEqual(
+            set(ShoppingListItem.objects.values_list(
+                'user', 'ingredient', 'total_amount'
+            )),
+            {
+                (row['user'], row['ingredient'], row['total_amount'])
+                for row in ShoppingListItem.objects.aggregate_carts()
+            }
+        )
+
+    def test_fixture(self):
+        self.assert_lists_match()
+
+    def test_api_cart(self):
+        url = f'{RECIPES_URL}{self.recipes[8].id}/shopping_cart/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assert_lists_match()
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assert_lists_match()
+
+    def test_cart_rows(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[9])
+        self.assert_lists_match()
+        ShoppingCart.objects.filter(recipe=self.recipes[0]).delete()
+        self.assert_lists_match()
+
+    def test_api_recipe_update(self):
+        recipe = self.recipes[5]
+        lines = list(recipe.ingredient_list.all())
+        client = APIClient()
+        client.force_authenticate(recipe.author)
+        response = client.patch(
+            f'{RECIPES_URL}{recipe.id}/',
+            {
+                'ingredients': [
+                    {'id': line.ingredient_id, 'amount': line.amount + 1}
+                    for line in lines[1:]
+                ] + [
+                    {
+                        'id': Ingredient.objects.exclude(
+                            ingredient_list__recipe=recipe
+                        ).first().pk,
+                        'amount': 4,
+                    }
+                ],
+                'tags': [recipe.tags.first().pk],
+                'name': 'Новое название',
+                'text': 'Новое описание',
+                'cooking_time': 5,
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_lists_match()
+
+    def test_api_recipe_destroy(self):
+        response = self.client.delete(f'{RECIPES_URL}{self.recipes[1].id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_lists_match()
+
+    def test_recipe_delete(self):
+        self.recipes[2].delete()
+        self.assert_lists_match()
+        Recipe.objects.filter(pk__in=[
+            recipe.pk for recipe in self.recipes[3:5]
+        ]).delete()
+        self.assert_lists_match()
+
+    def test_ingredient_lines(self):
+        line = self.recipes[4].ingredient_list.first()
+        line.amount += 7
+        line.save()
+        self.assert_lists_match()
+        line.ingredient = Ingredient.objects.exclude(
+            ingredient_list__recipe=self.recipes[4]
+        ).first()
+        line.save()
+        self.assert_lists_match()
+        RecipeIngredient.objects.create(
+            recipe=self.recipes[5],
+            ingredient=Ingredient.objects.exclude(
+                ingredient_list__recipe=self.recipes[5]
+            ).first(),
+            amount=3
+        )
+        self.assert_lists_match()
+        line.delete()
+        self.assert_lists_match()
+
+    def test_ingredient_delete(self):
+        Ingredient.objects.order_by('pk').first().delete()
+        self.assert_lists_match()
+
+    def test_user_delete(self):
+        self.author.delete()
+        self.assert_lists_match()
+
+
+class KeysetPaginationTest(FeedTestCase):
+    """Курсор проходит ленту без пропусков и повторов при равных ключах."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Recipe.objects.update(pub_date=timezone.now())
+        popular = [recipe.pk for recipe in cls.recipes[::3]]
+        Recipe.objects.filter(pk__in=popular).update(favorites_count=2)
+        RecipeScore.objects.update(trending=1.0)
+        RecipeScore.objects.filter(recipe__in=popular).update(trending=5.0)
+
+    def walk(self, url, key):
+        pages = []
+        while url:
+            response = self.guest.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([recipe['id'] for recipe in response.data['results']])
+            url = response.data[key]
+        return pages
+
+    def test_next_and_previous(self):
+        for ordering, fields in RECIPE_ORDERINGS.items():
+            with self.subTest(ordering=ordering):
+                expected = list(
+                    Recipe.objects.order_by(*fields).values_list(
+                        'pk', flat=True
+                    )
+                )
+                pages = self.walk(
+                    f'{RECIPES_URL}?cursor=&limit=5&ordering={ordering}',
+                    'next'
+                )
+                self.assertEqual([len(page) for page in pages], [5, 5, 2])
+                self.assertEqual(sum(pages, []), expected)
+                last = self.guest.get(
+                    f'{RECIPES_URL}?cursor=&limit=5&ordering={ordering}'
+                )
+                for _ in pages[1:]:
+                    last = self.guest.get(last.data['next'])
+                back = self.walk(last.data['previous'], 'previous')
+                self.assertEqual(sum(back[::-1], []), expected[:10])
+
+    def test_count(self):
+        response = self.guest.get(RECIPES_URL, {'cursor': '', 'count': 1})
+        self.assertEqual(response.data['count'], len(self.recipes))
+
+    def test_invalid_cursor(self):
+        for cursor in (
+            'broken',
+            base64.urlsafe_b64encode(b'{"p": ["1"], "r": false}').decode(),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.guest.get(RECIPES_URL, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class RecipeUpdateTest(FeedTestCase):
+    """Обновление рецепта меняет только отличающиеся строки."""
+
+    def test_change_one_ingredient(self):
+        recipe = self.recipes[3]
+        lines = list(recipe.ingredient_list.order_by('pk'))
+        data = {
+            'ingredients': [
+                {'id': line.ingredient_id, 'amount': line.amount}
+                for line in lines
+            ],
+            'tags': list(recipe.tags.values_list('pk', flat=True)),
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+        }
+        data['ingredients'][0]['amount'] += 10
+        with self.assertNumQueries(15):
+            response = self.client.patch(
+                f'{RECIPES_URL}{recipe.id}/', data, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(recipe.ingredient_list.order_by('pk').values_list(
+                'pk', 'ingredient', 'amount'
+            )),
+            [
+                (line.pk, line.ingredient_id, amount['amount'])
+                for line, amount in zip(lines, data['ingredients'])
+            ]
+        )
+
+
+class CountersTest(FeedTestCase):
+    """Счётчики рецептов и пользователей совпадают с данными."""
+
+    def assert_counters(self):
+        for counter in counters.COUNTERS:
+            with self.subTest(field=counter[1]):
+                self.assertEqual(counters.recount(*counter), 0)
+
+    def test_api(self):
+        recipe = self.recipes[0]
+        for url in (
+            f'{RECIPES_URL}{recipe.id}/favorite/',
+            f'{RECIPES_URL}{recipe.id}/shopping_cart/',
+            f'/api/users/{self.author.id}/subscribe/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url).status_code, 201)
+                self.assert_counters()
+                self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assert_counters()
+        response = self.client.delete(f'{RECIPES_URL}{self.recipes[1].id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_counters()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 6)
+
+    def test_cascades(self):
+        for recipe in self.recipes[:4]:
+            FavoriteRecipe.objects.create(user=self.user, recipe=recipe)
+            ShoppingCart.objects.create(user=self.author, recipe=recipe)
+        Subscribe.objects.create(user=self.user, author=self.author)
+        Subscribe.objects.create(user=self.author, author=self.user)
+        self.assert_counters()
+        Recipe.objects.filter(pk__in=[self.recipes[0].pk]).delete()
+        self.assert_counters()
+        FavoriteRecipe.objects.filter(recipe=self.recipes[1]).delete()
+        self.assert_counters()
+        self.author.delete()
+        self.assert_counters()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.subscribers_count, 0)
+
+    def test_recount_repairs_drift(self):
+        FavoriteRecipe.objects.create(user=self.user, recipe=self.recipes[0])
+        Recipe.objects.update(favorites_count=5)
+        User.objects.update(recipes_count=0)
+        self.assertEqual(
+            counters.recount(Recipe, 'favorites_count', FavoriteRecipe,
+                             'recipe'),
+            len(self.recipes)
+        )
+        self.assertEqual(
+            counters.recount(User, 'recipes_count', Recipe, 'author'), 2
+        )
+        self.assert_counters()
+        self.assertEqual(
+            Recipe.objects.get(pk=self.recipes[0].pk).favorites_count, 1
+        )
+
+
+class SubscriptionsTest(FeedTestCase):
+    """Подписки с последними рецептами авторов одним запросом."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.org',
+            first_name='Третий', last_name='Автор', password='pass12345!'
+        )
+        cls.recipes.append(Recipe.objects.create(
+            author=cls.other, name='Единственный', text='Описание',
+            cooking_time=1, image='recipes/images/test.jpg'
+        ))
+        now = timezone.now()
+        for index, recipe in enumerate(cls.recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(minutes=index)
+            )
+        Subscribe.objects.create(user=cls.user, author=cls.author)
+        Subscribe.objects.create(user=cls.user, author=cls.other)
+
+    def latest(self, author, limit):
+        return list(
+            author.recipes.order_by('-pub_date').values_list(
+                'pk', flat=True
+            )[:limit]
+        )
+
+    def test_recipes_limit(self):
+        for limit in (2, 5):
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(3):
+                    response = self.client.get(
+                        SUBSCRIPTIONS_URL, {'recipes_limit': limit}
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    {
+                        author['id']: [
+                            recipe['id'] for recipe in author['recipes']
+                        ]
+                        for author in response.data['results']
+                    },
+                    {
+                        self.author.id: self.latest(self.author, limit),
+                        self.other.id: self.latest(self.other, limit),
+                    }
+                )
+
+    def test_without_limit(self):
+        response = self.client.get(SUBSCRIPTIONS_URL)
+        self.assertEqual(
+            [len(author['recipes']) for author in response.data['results']],
+            [6, 1]
+        )
+
+    def test_invalid_limit(self):
+        for limit in ('abc', '0', '-1'):
+            with self.subTest(limit=limit):
+                response = self.client.get(
+                    SUBSCRIPTIONS_URL, {'recipes_limit': limit}
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+class BenchmarkScenariosTest(FeedTestCase):
+    """Все сценарии api.benchmarks отвечают без ошибок."""
+
+    def test_scenarios(self):
+        context = scenario_context(self.user)
+        samples = {}
+        for scenario in SCENARIOS:
+            client = self.client if scenario.auth else self.guest
+            elapsed, queries, response = measure(
+                client,
+                scenario.method,
+                scenario_path(scenario, context),
+                scenario_data(scenario, context),
+            )
+            with self.subTest(scenario=scenario.name):
+                self.assertLess(response.status_code, 400)
+            samples[scenario.name] = [
+                (elapsed, queries, response.status_code)
+            ]
+        stdout = StringIO()
+        write_report(OutputWrapper(stdout), summarize(samples))
+        self.assertEqual(len(stdout.getvalue().splitlines()), len(SCENARIOS))
@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    CustomUserViewSet, IngredientViewSet, RecipeViewSet, TagViewSet
+    CustomUserViewSet, IngredientViewSet, RecipeViewSet, StatsView,
+    TagViewSet
 )
 
 router = DefaultRouter()
@@ -12,6 +13,7 @@ router.register(r'ingredients', IngredientViewSet, basename='ingredients')
 router.register(r'recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
+    path('stats/', StatsView.as_view(), name='stats'),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path(r'auth/', include('djoser.urls.authtoken')),
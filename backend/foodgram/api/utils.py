@@ -1,10 +1,23 @@
-from rest_framework import status
+from django.db import transaction
+from rest_framework import serializers, status
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
 from recipes.models import Recipe
 
 
+def get_recipes_limit(request):
+    """Параметр recipes_limit: положительное число или None."""
+    limit = request.query_params.get('recipes_limit')
+    if not limit:
+        return None
+    if not limit.isdigit() or int(limit) < 1:
+        raise serializers.ValidationError(
+            {'recipes_limit': 'Укажите целое положительное число.'}
+        )
+    return int(limit)
+
+
 def post_and_delete(serializer_, model, request, recipe_id):
     """Опция добавления и удаления рецепта."""
     user = request.user
@@ -16,10 +29,12 @@ def post_and_delete(serializer_, model, request, recipe_id):
 
     if request.method == 'POST':
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    get_object_or_404(
-        model, user=user, recipe=get_object_or_404(Recipe, id=recipe_id)
-    ).delete()
+    with transaction.atomic():
+        get_object_or_404(
+            model, user=user, recipe=get_object_or_404(Recipe, id=recipe_id)
+        ).delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
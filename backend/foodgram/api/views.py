@@ -1,20 +1,35 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Value
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from recipes.models import (
-    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag
+    FavoriteRecipe, Ingredient, Recipe, ShoppingCart, ShoppingListItem, Tag
 )
 from users.models import Subscribe, User
 
+from .authentication import token_cache_stats
+from .exporters import EXPORTERS
+from .fast_serializers import FastRecipeSerializer, FastSubscriptionsSerializer
 from .filters import IngredientSearch, RecipeFilter
-from .pagination import CustomPageNumberPagination
+from .instrumentation import timed, view_stats
+from .mixins import (
+    CachedListMixin, CachedRecipeListMixin, SerializerTimingMixin
+)
+from .pagination import (
+    CustomPageNumberPagination, RecipeFeedPagination, RecipePagination,
+    SubscriptionsPagination
+)
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
     FavoriteRecipeSerializer, IngredientSerializer, RecipeGETSerializer,
@@ -22,15 +37,28 @@ from .serializers import (
     SubscriptionsGETSerializer, SubscriptionsPOSTSerializer, TagSerializer,
     UserGETSerializer, UserPOSTSerializer
 )
-from .utils import post_and_delete
+from .utils import get_recipes_limit, post_and_delete
 
+EXPORT_CHUNK_SIZE = 500
 
-class CustomUserViewSet(UserViewSet):
+
+class CustomUserViewSet(SerializerTimingMixin, UserViewSet):
     """Вьюсет для пользователей."""
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     pagination_class = CustomPageNumberPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.annotate(is_subscribed=Value(False))
+        return queryset.annotate(
+            is_subscribed=Exists(Subscribe.objects.filter(
+                user=user, author=OuterRef('pk')
+            ))
+        )
+
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PUT', 'PATCH'):
             return UserPOSTSerializer
@@ -63,15 +91,26 @@ class CustomUserViewSet(UserViewSet):
         methods=['GET'],
         detail=False,
         permission_classes=(IsAuthenticated,),
-        pagination_class=CustomPageNumberPagination
+        pagination_class=SubscriptionsPagination
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(subscribing__user=request.user)
+        queryset = User.objects.filter(
+            subscribing__user=request.user
+        ).annotate(is_subscribed=Value(True)).order_by('id')
         page = self.paginate_queryset(queryset)
-        serializer = SubscriptionsGETSerializer(
-            page, many=True, context={'request': request}
+        limit = get_recipes_limit(request)
+        recipes = {author.id: [] for author in page}
+        for recipe in Recipe.objects.latest_for_authors(recipes, limit):
+            recipes[recipe.author_id].append(recipe)
+        serializer_class = SubscriptionsGETSerializer
+        if settings.FAST_SERIALIZERS:
+            serializer_class = FastSubscriptionsSerializer
+        serializer = serializer_class(
+            page, many=True, context={'request': request, 'recipes': recipes}
         )
-        return self.get_paginated_response(serializer.data)
+        with timed('serializer'):
+            data = serializer.data
+        return self.get_paginated_response(data)
 
     @action(
         methods=['POST', 'DELETE'],
@@ -87,44 +126,77 @@ class CustomUserViewSet(UserViewSet):
                 author, data=request.data, context={'request': request}
             )
             serializer.is_valid(raise_exception=True)
-            Subscribe.objects.create(user=user, author=author)
+            with transaction.atomic():
+                Subscribe.objects.create(user=user, author=author)
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED
             )
-        get_object_or_404(Subscribe, user=user, author=author).delete()
+        with transaction.atomic():
+            get_object_or_404(Subscribe, user=user, author=author).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(
+    CachedListMixin, SerializerTimingMixin, viewsets.ReadOnlyModelViewSet
+):
     """Вьюсет для тегов."""
+    cache_version = 'tag'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    CachedListMixin, SerializerTimingMixin, viewsets.ReadOnlyModelViewSet
+):
     """Вьюсет для ингредиентов."""
+    cache_version = 'ingredient'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
     filter_backends = (IngredientSearch,)
-    search_fields = ('^name',)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    CachedRecipeListMixin, SerializerTimingMixin, viewsets.ModelViewSet
+):
     """Вьюсет для рецептов."""
     queryset = Recipe.objects.all()
     serializer_class = RecipeGETSerializer
     permission_classes = (IsAuthorOrReadOnly,)
-    pagination_class = CustomPageNumberPagination
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        return Recipe.objects.for_feed(self.request.user)
+
+    def is_dry_run(self):
+        return self.request.query_params.get('dry_run') in ('1', 'true')
+
+    def create(self, request, *args, **kwargs):
+        if not self.is_dry_run():
+            return super().create(request, *args, **kwargs)
+        self.get_serializer(data=request.data).is_valid(raise_exception=True)
+        return Response({'detail': 'Рецепт прошёл проверку.'})
+
+    def update(self, request, *args, **kwargs):
+        if not self.is_dry_run():
+            return super().update(request, *args, **kwargs)
+        self.get_serializer(
+            self.get_object(),
+            data=request.data,
+            partial=kwargs.get('partial', False)
+        ).is_valid(raise_exception=True)
+        return Response({'detail': 'Рецепт прошёл проверку.'})
+
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PUT', 'PATCH'):
             return RecipePOSTserializer
+        if settings.FAST_SERIALIZERS:
+            return FastRecipeSerializer
         return RecipeGETSerializer
 
     @action(
@@ -151,25 +223,72 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         methods=['GET'],
         detail=False,
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        pagination_class=RecipeFeedPagination,
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок пользователя, новые первыми."""
+        queryset = self.filter_queryset(
+            self.get_queryset().followed_by(request.user)
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=EXPORTERS
     )
     def download_shopping_cart(self, request, **kwargs):
-        ingredients = (
-            RecipeIngredient.objects
-            .filter(recipe__shopping_recipe__user=request.user)
-            .values('ingredient')
-            .annotate(total_amount=Sum('amount'))
-            .values_list(
-                'ingredient__name',
-                'total_amount',
-                'ingredient__measurement_unit'
-            )
+        exporter = request.accepted_renderer
+        updated = User.objects.filter(pk=request.user.pk).values_list(
+            'shopping_cart_updated', flat=True
+        ).get()
+        last_modified = int(updated.timestamp()) if updated else None
+        etag = quote_etag('{}-{}-{}'.format(
+            request.user.pk,
+            exporter.format,
+            updated.timestamp() if updated else 0
+        ))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
         )
-        file_name = 'shopping_cart.txt'
-        file_list = []
-        [file_list.append(
-            '{} - {} {}.'.format(*ingredient)) for ingredient in ingredients]
-        file = HttpResponse('Cписок покупок:\n' + '\n'.join(file_list),
-                            content_type='text/plain')
-        file['Content-Disposition'] = (f'attachment; filename={file_name}')
-        return file
+        if response is None:
+            ingredients = (
+                ShoppingListItem.objects
+                .filter(user=request.user)
+                .values_list(
+                    'ingredient__name',
+                    'total_amount',
+                    'ingredient__measurement_unit'
+                )
+                .order_by('ingredient__name')
+            )
+            response = StreamingHttpResponse(
+                exporter.stream(
+                    ingredients.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+                ),
+                content_type=exporter.media_type
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename=shopping_cart.{exporter.extension}'
+            )
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class StatsView(APIView):
+    """Перцентили времени запросов по вью и попадания в кеш токенов
+    в текущем процессе."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({
+            'views': view_stats.summary(),
+            'token_cache': token_cache_stats(),
+        })
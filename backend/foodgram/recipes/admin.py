@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import images
 from .models import (
     FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart, Tag
 )
@@ -39,7 +40,14 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @admin.display(description='Кол-во в избранных')
     def count_favorites(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
+
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            obj.image_renditions = {}
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            images.schedule(obj)
 
 
 class RecipeIngredientAdmin(admin.ModelAdmin):
@@ -0,0 +1,72 @@
+"""Счётчики, хранящиеся в строках рецептов и пользователей.
+
+Меняются атомарно через F() сигналами post_save и post_delete
+связанных записей, в том числе при удалении из админки и каскадом.
+Массовые bulk_create и update сигналов не вызывают, после них
+расхождения исправляет команда recount.
+"""
+from django.db import connections, models
+from django.db.models.functions import Coalesce
+
+from users.models import Subscribe, User
+
+from .models import FavoriteRecipe, Recipe, ShoppingCart
+
+# (модель, поле счётчика, связанная модель, внешний ключ на модель)
+COUNTERS = (
+    (Recipe, 'favorites_count', FavoriteRecipe, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscribe, 'author'),
+)
+
+
+def change(model, pk, field, delta):
+    """Увеличивает счётчик field у объекта pk на delta.
+
+    Счётчик не уходит ниже нуля, если он уже разошёлся с данными.
+    """
+    objects = model.objects.filter(pk=pk)
+    if delta < 0:
+        objects = objects.filter(**{f'{field}__gte': -delta})
+    objects.update(**{field: models.F(field) + delta})
+
+
+def recount_sql(model, field, related, foreign_key):
+    """UPDATE ... FROM с агрегатом для PostgreSQL, меняет только строки
+    с расхождением."""
+    table = model._meta.db_table
+    column = model._meta.get_field(field).column
+    related_table = related._meta.db_table
+    related_column = related._meta.get_field(foreign_key).column
+    return (
+        f'UPDATE {table} AS target '
+        f'SET {column} = COALESCE(actual.total, 0) '
+        f'FROM {table} AS source '
+        f'LEFT JOIN (SELECT {related_column} AS object_id, COUNT(*) AS total '
+        f'FROM {related_table} GROUP BY {related_column}) AS actual '
+        'ON actual.object_id = source.id '
+        'WHERE target.id = source.id '
+        f'AND target.{column} <> COALESCE(actual.total, 0)'
+    )
+
+
+def recount(model, field, related, foreign_key):
+    """Пересчёт счётчика одним запросом, возвращает число исправленных
+    строк."""
+    connection = connections[model.objects.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(recount_sql(model, field, related, foreign_key))
+            return cursor.rowcount
+    actual = Coalesce(
+        models.Subquery(
+            related.objects.filter(**{foreign_key: models.OuterRef('pk')})
+            .order_by()
+            .values(foreign_key)
+            .annotate(total=models.Count('*'))
+            .values('total')
+        ),
+        0,
+    )
+    return model.objects.exclude(**{field: actual}).update(**{field: actual})
@@ -0,0 +1,132 @@
+"""Уменьшенные копии картинок рецептов.
+
+Загруженная картинка сохраняется как есть, а копии для ленты
+и страницы рецепта строятся в фоновом потоке после коммита транзакции.
+Копии сохраняются без метаданных (EXIF и прочее), их размеры и пути
+записываются в Recipe.image_renditions.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'thumbnail': 480,
+    'medium': 1200,
+}
+FORMATS = {
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+UPLOAD_TO = 'recipes/renditions'
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    thread_name_prefix='recipe-images',
+)
+
+
+def build_renditions(recipe):
+    """Строит копии картинки рецепта и возвращает их описание.
+
+    Картинка не увеличивается: копии больше оригинала не строятся,
+    последней остаётся копия размером с оригинал.
+    """
+    with recipe.image.open('rb') as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image = image.convert('RGB')
+    renditions = {
+        'original': {'width': image.width, 'height': image.height},
+    }
+    for name, width in RENDITIONS.items():
+        copy = image.copy()
+        copy.thumbnail((width, width * 4))
+        rendition = {'width': copy.width, 'height': copy.height}
+        for extension, (image_format, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            copy.save(buffer, image_format, **options)
+            rendition[extension] = default_storage.save(
+                f'{UPLOAD_TO}/{recipe.pk}/{name}.{extension}',
+                ContentFile(buffer.getvalue())
+            )
+        renditions[name] = rendition
+        if copy.size == image.size:
+            break
+    return renditions
+
+
+def rendition_files(renditions):
+    return {
+        path
+        for rendition in renditions.values()
+        for extension, path in rendition.items()
+        if extension in FORMATS
+    }
+
+
+def remove_stale(recipe_id, keep):
+    """Удаляет файлы копий рецепта, кроме перечисленных в keep."""
+    directory = f'{UPLOAD_TO}/{recipe_id}'
+    if not default_storage.exists(directory):
+        return
+    for name in default_storage.listdir(directory)[1]:
+        if f'{directory}/{name}' not in keep:
+            default_storage.delete(f'{directory}/{name}')
+
+
+def process(recipe_id):
+    """Строит копии картинки рецепта и записывает их в базу.
+
+    Возвращает True, если копии сохранены.
+
+    Если за время обработки картинку рецепта заменили, результат
+    отбрасывается: копии построит задача, поставленная при замене.
+    """
+    from .models import Recipe
+
+    try:
+        recipe = Recipe.objects.get(pk=recipe_id)
+        renditions = build_renditions(recipe)
+        updated = Recipe.objects.filter(
+            pk=recipe.pk, image=recipe.image.name
+        ).update(image_renditions=renditions)
+        if updated:
+            remove_stale(recipe.pk, rendition_files(renditions))
+            bump_version('recipe')
+            return True
+        for path in rendition_files(renditions):
+            default_storage.delete(path)
+    except Recipe.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception(
+            'Не удалось обработать картинку рецепта %s', recipe_id
+        )
+    return False
+
+
+def task(recipe_id):
+    """Обработка в потоке пула со своим подключением к базе."""
+    close_old_connections()
+    try:
+        process(recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(recipe):
+    """Ставит обработку картинки рецепта в очередь после коммита."""
+    recipe_id = recipe.pk
+    if settings.IMAGE_PROCESSING_SYNC:
+        transaction.on_commit(lambda: process(recipe_id))
+    else:
+        transaction.on_commit(lambda: executor.submit(task, recipe_id))
@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.benchmarks import (
+    SCENARIOS, measure, scenario_context, scenario_data, scenario_path,
+    summarize, write_report
+)
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер времени и числа SQL-запросов по всем маршрутам API "
+        "в текущем процессе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument(
+            '--user', help='username пользователя для запросов с токеном.'
+        )
+        parser.add_argument(
+            '--scenario', action='append', default=[],
+            help='Только сценарии с таким началом имени.',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.',
+        )
+        parser.add_argument('--output', help='Файл для отчёта в JSON.')
+
+    def get_user(self, username):
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+        else:
+            users = users.filter(subscriber__isnull=False).distinct()
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError(
+                'Нет пользователя для замеров, запустите seed_benchmark_data.'
+            )
+        return user
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        user = self.get_user(options['user'])
+        context = scenario_context(user)
+        if context is None:
+            raise CommandError(
+                'Недостаточно данных, запустите seed_benchmark_data.'
+            )
+        anonymous = APIClient()
+        authorized = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        authorized.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['scenario'] or any(
+                scenario.name.startswith(prefix)
+                for prefix in options['scenario']
+            )
+        ]
+        samples = defaultdict(list)
+        for _ in range(options['rounds']):
+            for scenario in scenarios:
+                client = authorized if scenario.auth else anonymous
+                if options['cold']:
+                    cache.clear()
+                elapsed, queries, response = measure(
+                    client,
+                    scenario.method,
+                    scenario_path(scenario, context),
+                    scenario_data(scenario, context),
+                )
+                samples[scenario.name].append(
+                    (elapsed, queries, response.status_code)
+                )
+        write_report(self.stdout, summarize(samples), options['output'])
@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+
+from api.benchmarks import (
+    USERNAME_PREFIX, measure, summarize, write_report
+)
+from users.models import Subscribe, User
+
+FOLLOWS = (10, 100, 1000)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер ленты подписок /api/recipes/feed/ для читателя "
+        "с 10, 100 и 1000 подписками."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument(
+            '--follows', type=int, nargs='*', default=FOLLOWS,
+            help='Число подписок читателя.',
+        )
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Сколько страниц ленты пройти по курсору за раунд.',
+        )
+        parser.add_argument('--output', help='Файл для отчёта в JSON.')
+
+    def get_authors(self, count):
+        authors = list(
+            User.objects.order_by('-recipes_count', 'pk')
+            .values_list('pk', flat=True)[:count]
+        )
+        if len(authors) < count:
+            raise CommandError(
+                f'Пользователей {len(authors)}, нужно {count}: '
+                'запустите seed_benchmark_data с большим --users.'
+            )
+        return authors
+
+    def measure(self, client, pages):
+        """Время и число запросов для каждой из pages страниц ленты."""
+        rows = []
+        url = '/api/recipes/feed/'
+        for _ in range(pages):
+            elapsed, queries, response = measure(client, 'get', url)
+            rows.append((elapsed, queries, response.status_code))
+            url = response.data.get('next') if response.data else None
+            if not url:
+                break
+        return rows
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        samples = defaultdict(list)
+        for count in options['follows']:
+            authors = self.get_authors(count)
+            with transaction.atomic():
+                reader = User.objects.create_user(
+                    username=f'{USERNAME_PREFIX}feed_reader',
+                    email=f'{USERNAME_PREFIX}feed_reader@example.com',
+                    first_name='Читатель',
+                    last_name='Ленты',
+                )
+                Subscribe.objects.bulk_create(
+                    Subscribe(user=reader, author_id=author)
+                    for author in authors
+                )
+                client = APIClient()
+                client.force_authenticate(reader)
+                for _ in range(options['rounds']):
+                    for page, row in enumerate(
+                        self.measure(client, options['pages']), 1
+                    ):
+                        samples[f'feed-{count}-page-{page}'].append(row)
+                transaction.set_rollback(True)
+        write_report(self.stdout, summarize(samples), options['output'])
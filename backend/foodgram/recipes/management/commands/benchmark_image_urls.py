@@ -0,0 +1,44 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeSerializer
+from recipes.models import Recipe
+
+
+class Base64RecipeSerializer(serializers.ModelSerializer):
+    """Прежний вариант RecipeSerializer с Base64ImageField."""
+    image = Base64ImageField(read_only=True)
+
+    class Meta:
+        model = Recipe
+        fields = ('id', 'name', 'image', 'cooking_time')
+
+
+class Command(BaseCommand):
+    help = "Время сериализации ссылок на картинки для 100 рецептов."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        recipes = list(Recipe.objects.all()[:options['count']])
+        if not recipes:
+            self.stdout.write('Нет рецептов для замера.')
+            return
+        for serializer in (Base64RecipeSerializer, RecipeSerializer):
+            def run():
+                request = Request(APIRequestFactory().get('/api/recipes/'))
+                return serializer(
+                    recipes, many=True, context={'request': request}
+                ).data
+            best = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+            self.stdout.write(
+                f'{serializer.__name__}: {best * 1000:.2f} мс '
+                f'на {len(recipes)} рецептов'
+            )
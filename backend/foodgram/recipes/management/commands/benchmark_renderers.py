@@ -0,0 +1,46 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeGETSerializer
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Время рендеринга JSON страницы рецептов."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = User.objects.first()
+        recipes = Recipe.objects.for_feed(request.user)[:options['count']]
+        data = {
+            'count': len(recipes),
+            'next': None,
+            'previous': None,
+            'results': RecipeGETSerializer(
+                recipes, many=True, context={'request': request}
+            ).data,
+        }
+        results = {}
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            results[renderer] = renderer.render(data)
+            best = min(timeit.repeat(
+                lambda: renderer.render(data), number=options['repeat'],
+                repeat=5,
+            )) / options['repeat']
+            self.stdout.write(
+                f'{type(renderer).__name__}: {best * 1e6:.1f} мкс на ответ '
+                f'из {len(data["results"])} рецептов '
+                f'({len(results[renderer])} байт)'
+            )
+        if len(set(results.values())) != 1:
+            self.stderr.write('Ответы рендереров отличаются.')
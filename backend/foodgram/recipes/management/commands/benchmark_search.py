@@ -0,0 +1,56 @@
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+
+from api.benchmarks import measure, summarize, write_report
+from recipes.models import Recipe
+
+QUERIES = (
+    'борщ', 'пироги', 'суп с грибами', 'праздничный торт',
+    'обжарить с луком', 'несуществующее блюдо',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер поиска /api/recipes/?search= по заполненной базе, "
+        "например после seed_benchmark_data --recipes 100000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10)
+        parser.add_argument(
+            '--query', action='append',
+            help='Поисковый запрос, по умолчанию набор типичных запросов.',
+        )
+        parser.add_argument('--output', help='Файл для отчёта в JSON.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        if not Recipe.objects.exists():
+            raise CommandError(
+                'Рецептов нет, запустите seed_benchmark_data.'
+            )
+        client = APIClient()
+        samples = defaultdict(list)
+        found = {}
+        for _ in range(options['rounds']):
+            for query in options['query'] or QUERIES:
+                cache.clear()
+                elapsed, queries, response = measure(
+                    client, 'get',
+                    '/api/recipes/?' + urlencode({'search': query})
+                )
+                samples[query].append(
+                    (elapsed, queries, response.status_code)
+                )
+                found[query] = response.data.get('count')
+        report = summarize(samples)
+        report['recipes'] = Recipe.objects.count()
+        for name, row in report['scenarios'].items():
+            row['found'] = found[name]
+        write_report(self.stdout, report, options['output'])
@@ -0,0 +1,43 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import FastRecipeSerializer
+from api.serializers import RecipeGETSerializer
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Сверка ответов быстрых сериализаторов с сериализаторами DRF."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100)
+        parser.add_argument(
+            '--user', type=int, help='id пользователя для флагов рецептов.'
+        )
+
+    def handle(self, *args, **options):
+        user = AnonymousUser()
+        if options['user']:
+            user = User.objects.get(pk=options['user'])
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        recipes = list(
+            Recipe.objects.for_feed(user)[:options['count']]
+        )
+        context = {'request': request}
+        expected = RecipeGETSerializer(recipes, many=True, context=context)
+        actual = FastRecipeSerializer(recipes, many=True, context=context)
+        mismatches = [
+            recipe['id']
+            for recipe, fast in zip(expected.data, actual.data)
+            if recipe != fast or list(recipe) != list(fast)
+        ]
+        for pk in mismatches:
+            self.stdout.write(f'Рецепт {pk}: ответы отличаются.')
+        if mismatches:
+            raise CommandError(f'Расхождений: {len(mismatches)}.')
+        self.stdout.write(
+            f'Ответы совпадают для {len(recipes)} рецептов.'
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = "Сверка сводных списков покупок с корзинами."
+
+    def handle(self, *args, **options):
+        stored = {
+            (user, ingredient): amount
+            for user, ingredient, amount
+            in ShoppingListItem.objects.values_list(
+                'user', 'ingredient', 'total_amount'
+            )
+        }
+        expected = {
+            (row['user'], row['ingredient']): row['total_amount']
+            for row in ShoppingListItem.objects.aggregate_carts()
+        }
+        mismatches = sorted(
+            key for key in stored.keys() | expected.keys()
+            if stored.get(key) != expected.get(key)
+        )
+        for user, ingredient in mismatches:
+            self.stdout.write(
+                f'Пользователь {user}, ингредиент {ingredient}: '
+                f'в списке {stored.get((user, ingredient))}, '
+                f'по корзине {expected.get((user, ingredient))}.'
+            )
+        if mismatches:
+            raise CommandError(
+                f'Расхождений: {len(mismatches)}. '
+                'Запустите rebuild_shopping_lists.'
+            )
+        self.stdout.write('Списки покупок совпадают с корзинами.')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчёт рейтинга рецептов для ?ordering=trending, "
+        "запускается по расписанию."
+    )
+
+    def handle(self, *args, **options):
+        count = trending.update()
+        self.stdout.write(f'Рейтинг пересчитан, рецептов в тренде: {count}.')
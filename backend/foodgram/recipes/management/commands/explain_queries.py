@@ -0,0 +1,105 @@
+import re
+from types import SimpleNamespace
+
+from django.core.exceptions import EmptyResultSet
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from api.filters import RecipeFilter
+from recipes.models import Recipe, ShoppingListItem, Tag
+from users.models import User
+
+PAGE_SIZE = 6
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+}
+ALLOWED_TABLES = ('recipes_tag', 'django_migrations')
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверка планов запросов API: "
+        "падает, если запрос читает таблицу целиком."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--allow',
+            nargs='*',
+            default=ALLOWED_TABLES,
+            help='Таблицы, которые можно читать целиком.',
+        )
+
+    def get_querysets(self):
+        user = User.objects.annotate(
+            favorites=Count('favorite_user')
+        ).order_by('-favorites').first()
+        if user is None:
+            raise CommandError(
+                'База пуста, сначала заполните её тестовыми данными.'
+            )
+        request = SimpleNamespace(user=user)
+        feed = Recipe.objects.for_feed(user)
+        tag = Tag.objects.order_by('pk').first()
+        author = User.objects.order_by('-recipes_count').first()
+
+        def filtered(**data):
+            return RecipeFilter(data, queryset=feed, request=request).qs
+
+        return {
+            'лента': feed[:PAGE_SIZE],
+            'лента автора': filtered(author=author.pk)[:PAGE_SIZE],
+            'лента по тегу': filtered(tags=[tag.slug])[:PAGE_SIZE],
+            'популярные': filtered(ordering='popular')[:PAGE_SIZE],
+            'в тренде по тегу': filtered(
+                ordering='trending', tags=[tag.slug]
+            )[:PAGE_SIZE],
+            'лента подписок': feed.followed_by(user).order_by(
+                '-pub_date', 'id'
+            )[:PAGE_SIZE],
+            'поиск': filtered(search='пирог')[:PAGE_SIZE],
+            'избранное': filtered(is_favorited=True)[:PAGE_SIZE],
+            'корзина': filtered(is_in_shopping_cart=True)[:PAGE_SIZE],
+            'подписки': User.objects.filter(
+                subscribing__user=user
+            ).order_by('id')[:PAGE_SIZE],
+            'список покупок': ShoppingListItem.objects.filter(
+                user=user
+            ).values_list(
+                'ingredient__name',
+                'total_amount',
+                'ingredient__measurement_unit'
+            ).order_by('ingredient__name'),
+        }
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'Разбор планов для {connection.vendor} не поддерживается.'
+            )
+        explain_options = {}
+        if connection.vendor == 'postgresql':
+            explain_options = {'analyze': True, 'buffers': True}
+        failed = []
+        for name, queryset in self.get_querysets().items():
+            self.stdout.write(f'== {name}')
+            try:
+                queryset.query.sql_with_params()
+            except EmptyResultSet:
+                self.stdout.write('Пустая выборка, запрос не выполняется.')
+                continue
+            plan = queryset.explain(**explain_options)
+            scans = sorted(
+                set(pattern.findall(plan)) - set(options['allow'])
+            )
+            self.stdout.write(plan)
+            if scans:
+                failed.append(f'{name}: {", ".join(scans)}')
+        if failed:
+            raise CommandError(
+                'Полное чтение таблиц:\n' + '\n'.join(failed)
+            )
+        self.stdout.write('Все запросы используют индексы.')
@@ -1,33 +1,155 @@
 import csv
+import json
 import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
-from progress.bar import IncrementalBar
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from foodgram import settings
 from recipes.models import Ingredient
+from recipes.search import ingredient_index
 
+BATCH_SIZE = 1000
+JSON_CHUNK_SIZE = 64 * 1024
 
-def ingredient_create(row):
-    Ingredient.objects.get_or_create(
-        name=row[0],
-        measurement_unit=row[1]
-    )
+
+def read_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < 2:
+            raise CommandError(
+                f'Строка {reader.line_num}: ожидается название '
+                'и единица измерения.'
+            )
+        yield row[0], row[1]
+
+
+def ingredient_row(item):
+    try:
+        return item['name'], item['measurement_unit']
+    except (KeyError, TypeError):
+        raise CommandError(f'Неверный ингредиент: {item!r}.')
+
+
+def read_json(file):
+    """Потоковое чтение JSON-массива объектов ингредиентов."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    for chunk in iter(lambda: file.read(JSON_CHUNK_SIZE), ''):
+        buffer += chunk
+        if not started:
+            buffer = buffer.lstrip()
+            if not buffer:
+                continue
+            if buffer[0] != '[':
+                raise CommandError('Ожидается JSON-массив ингредиентов.')
+            buffer = buffer[1:]
+            started = True
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if not buffer or buffer[0] == ']':
+                break
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                break
+            yield ingredient_row(item)
+            buffer = buffer[end:]
+    if buffer.strip() != ']':
+        raise CommandError('Файл JSON обрезан или повреждён.')
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
 
 
 class Command(BaseCommand):
     help = "Загрузка ингредиентов в базу данных."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'ingredients.csv'),
+            help='Файл .csv или .json с ингредиентами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк в одном INSERT.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Показать отличия файла от базы, ничего не записывая.',
+        )
+
     def handle(self, *args, **options):
-        path = os.path.join(settings.BASE_DIR, 'ingredients.csv')
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .csv и .json.')
+        started = time.perf_counter()
         with open(path, 'r', encoding='utf-8') as file:
-            row_count = sum(1 for row in file)
-        with open(path, 'r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            bar = IncrementalBar('ingredients.csv'.ljust(17), max=row_count)
-            next(reader)
-            for row in reader:
-                bar.next()
-                ingredient_create(row)
-            bar.finish()
-        self.stdout.write("Ингредиенты добавлены в базу данных.")
+            if options['dry_run']:
+                rows = self.diff(reader(file))
+            else:
+                rows = self.load(reader(file), options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Обработано строк: {rows} за {elapsed:.2f} с '
+            f'({rows / elapsed if elapsed else 0:.0f} строк/с).'
+        )
+
+    def load(self, rows, batch_size):
+        count = Ingredient.objects.count()
+        total = 0
+        with transaction.atomic():
+            for batch in batches(rows, batch_size):
+                Ingredient.objects.bulk_create(
+                    [
+                        Ingredient(name=name, measurement_unit=unit)
+                        for name, unit in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+                total += len(batch)
+        ingredient_index.invalidate()
+        self.stdout.write(
+            'Ингредиенты добавлены в базу данных: '
+            f'{Ingredient.objects.count() - count} новых.'
+        )
+        return total
+
+    def diff(self, rows):
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        seen = set()
+        total = 0
+        for row in rows:
+            if row not in existing and row not in seen:
+                self.stdout.write('+ {}, {}'.format(*row))
+            seen.add(row)
+            total += 1
+        for row in sorted(existing - seen):
+            self.stdout.write('- {}, {}'.format(*row))
+        self.stdout.write(
+            f'Будет добавлено: {len(seen - existing)}, '
+            f'нет в файле: {len(existing - seen)}.'
+        )
+        return total
@@ -0,0 +1,174 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import (
+    PASSWORD, SCENARIOS, USERNAME_PREFIX, scenario_data, scenario_path,
+    summarize, write_report
+)
+
+
+class VirtualUser(threading.Thread):
+    """Пользователь, выполняющий сценарии в случайном порядке по весам.
+
+    Для пары POST/DELETE по одному адресу (избранное, корзина, подписка)
+    DELETE выполняется сразу после POST, чтобы данные не накапливались.
+    """
+
+    def __init__(self, base_url, number, deadline, wait, samples, lock):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.number = number
+        self.deadline = deadline
+        self.wait = wait
+        self.samples = samples
+        self.lock = lock
+        self.token = None
+        self.error = None
+        self.rng = random.Random(number)
+
+    def request(self, method, path, data=None, auth=True):
+        headers = {'Accept': '*/*'}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if auth and self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        request = Request(
+            self.base_url + path, data=body, headers=headers,
+            method=method.upper()
+        )
+        started = time.perf_counter()
+        try:
+            with urlopen(request) as response:
+                content = response.read()
+                status = response.status
+        except HTTPError as error:
+            content = error.read()
+            status = error.code
+        return (time.perf_counter() - started) * 1000, status, content
+
+    def login(self):
+        _, status, content = self.request('post', '/api/auth/token/login/', {
+            'email': f'{USERNAME_PREFIX}{self.number}@example.com',
+            'password': PASSWORD,
+        }, auth=False)
+        if status != 200:
+            raise ValueError(
+                f'не удалось войти как {USERNAME_PREFIX}{self.number}'
+            )
+        self.token = json.loads(content)['auth_token']
+
+    def get_context(self):
+        me = json.loads(self.request('get', '/api/users/me/')[2])
+        recipes = json.loads(self.request('get', '/api/recipes/?limit=50')[2])
+        tag = json.loads(self.request('get', '/api/tags/')[2])[0]
+        recipe = next(
+            item for item in recipes['results']
+            if not item['is_favorited'] and not item['is_in_shopping_cart']
+        )
+        author = next(
+            item['author'] for item in recipes['results']
+            if not item['author']['is_subscribed']
+            and item['author']['id'] != me['id']
+        )
+        ingredient = recipe['ingredients'][0]
+        return {
+            'recipe': recipe['id'],
+            'author': author['id'],
+            'tag': tag['id'],
+            'tag_slug': tag['slug'],
+            'ingredient': ingredient['id'],
+            'query': ingredient['name'][:3],
+            'recipe_word': recipe['name'].split()[0],
+        }
+
+    def record(self, scenario, context):
+        elapsed, status, _ = self.request(
+            scenario.method,
+            scenario_path(scenario, context),
+            scenario_data(scenario, context),
+            scenario.auth,
+        )
+        with self.lock:
+            self.samples[scenario.name].append((elapsed, None, status))
+
+    def run(self):
+        try:
+            self.login()
+            context = self.get_context()
+        except Exception as error:
+            self.error = error
+            return
+        deletes = {
+            scenario.path: scenario
+            for scenario in SCENARIOS if scenario.method == 'delete'
+        }
+        scenarios = [
+            scenario for scenario in SCENARIOS if scenario.method != 'delete'
+        ]
+        weights = [scenario.weight for scenario in scenarios]
+        while time.monotonic() < self.deadline:
+            scenario = self.rng.choices(scenarios, weights)[0]
+            self.record(scenario, context)
+            if scenario.method == 'post' and scenario.path in deletes:
+                self.record(deletes[scenario.path], context)
+            if self.wait:
+                time.sleep(self.rng.uniform(0, self.wait))
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест запущенного сервера пользователями "
+        "из seed_benchmark_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', default='http://127.0.0.1:8000',
+            help='Адрес сервера (runserver или gunicorn).',
+        )
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Число одновременных пользователей.',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность теста в секундах.',
+        )
+        parser.add_argument(
+            '--wait', type=float, default=0,
+            help='Наибольшая пауза между запросами в секундах.',
+        )
+        parser.add_argument('--output', help='Файл для отчёта в JSON.')
+
+    def handle(self, *args, **options):
+        samples = defaultdict(list)
+        lock = threading.Lock()
+        started = time.monotonic()
+        deadline = started + options['duration']
+        users = [
+            VirtualUser(
+                options['base_url'].rstrip('/'), number, deadline,
+                options['wait'], samples, lock
+            )
+            for number in range(options['users'])
+        ]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        errors = [user.error for user in users if user.error]
+        if len(errors) == len(users):
+            raise CommandError(f'Пользователи не запустились: {errors[0]}')
+        report = summarize(samples, time.monotonic() - started)
+        report['base_url'] = options['base_url']
+        report['users'] = options['users']
+        write_report(self.stdout, report, options['output'])
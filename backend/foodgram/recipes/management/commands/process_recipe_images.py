@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from recipes import images
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Построение копий картинок рецептов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить копии у всех рецептов, а не только без копий.',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_renditions={})
+        ids = list(recipes.values_list('pk', flat=True))
+        processed = sum(images.process(pk) for pk in ids)
+        self.stdout.write(
+            f'Обработано картинок: {processed} из {len(ids)}.'
+        )
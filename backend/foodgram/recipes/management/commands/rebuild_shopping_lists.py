@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = "Пересчёт сводных списков покупок по корзинам."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ShoppingListItem.objects.rebuild()
+        self.stdout.write(
+            f'Списки покупок пересчитаны: '
+            f'{ShoppingListItem.objects.count()} строк.'
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes import counters
+
+
+class Command(BaseCommand):
+    help = "Пересчёт счётчиков избранного, корзин, рецептов и подписчиков."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for model, field, related, foreign_key in counters.COUNTERS:
+                fixed = counters.recount(model, field, related, foreign_key)
+                self.stdout.write(
+                    f'{model.__name__}.{field}: исправлено строк {fixed}.'
+                )
@@ -0,0 +1,239 @@
+import io
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from api.benchmarks import PASSWORD, USERNAME_PREFIX
+from recipes import counters, trending
+from recipes.models import (
+    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    ShoppingListItem, Tag
+)
+from recipes.search import ingredient_index
+from recipes.versions import bump_version
+from users.models import Subscribe, User
+
+BATCH_SIZE = 1000
+# Одна картинка на все рецепты, в git не попадает (см. .gitignore).
+IMAGE_NAME = 'recipes/images/benchmark.jpg'
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#D2B48C', 'dessert'),
+    ('Выпечка', '#A0522D', 'bakery'),
+)
+
+DISHES = (
+    'Борщ', 'Суп', 'Салат', 'Пирог', 'Каша', 'Омлет', 'Плов', 'Запеканка',
+    'Рагу', 'Блины', 'Котлеты', 'Паста', 'Оладьи', 'Пельмени', 'Торт',
+)
+STYLES = (
+    'по-домашнему', 'с грибами', 'с курицей', 'с сыром', 'овощной',
+    'бабушкин', 'быстрый', 'постный', 'праздничный', 'с яблоками',
+)
+TEXT_WORDS = (
+    'нарезать', 'смешать', 'добавить', 'посолить', 'обжарить', 'варить',
+    'запекать', 'минут', 'духовке', 'сковороде', 'кастрюле', 'масле',
+    'луком', 'морковью', 'чесноком', 'сметаной', 'зеленью', 'перцем',
+    'тесто', 'начинку', 'подавать', 'горячим', 'охладить', 'остудить',
+)
+TEXT_LENGTH = 40
+
+
+def zipf_weights(count, exponent=1.1):
+    """Веса популярности: немногие элементы встречаются чаще всех."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def sample(rng, population, cum_weights, count):
+    """count разных элементов с учётом весов."""
+    count = min(count, len(population))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(
+            range(len(population)), cum_weights=cum_weights,
+            k=count - len(chosen)
+        ))
+    return [population[index] for index in chosen]
+
+
+class Command(BaseCommand):
+    help = "Заполнение базы данными для нагрузочных замеров."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора для повторяемых данных.',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить ранее созданных пользователей bench_* и их данные.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['clear']:
+            deleted, _ = User.objects.filter(
+                username__startswith=USERNAME_PREFIX
+            ).delete()
+            self.stdout.write(f'Удалено объектов: {deleted}.')
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients', stdout=self.stdout)
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            tags = self.create_tags()
+            recipes = self.create_recipes(rng, users, tags, options['recipes'])
+            self.create_relations(rng, users, recipes)
+            ShoppingListItem.objects.rebuild()
+            for counter in counters.COUNTERS:
+                counters.recount(*counter)
+        trending.update()
+        Recipe.objects.update_search_vector()
+        ingredient_index.invalidate()
+        bump_version('tag')
+        bump_version('recipe')
+        self.stdout.write(
+            f'Создано пользователей: {len(users)}, рецептов: {len(recipes)}. '
+            f'Пароль пользователей {USERNAME_PREFIX}*: {PASSWORD}'
+        )
+
+    def create_users(self, count):
+        start = User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).count()
+        password = make_password(PASSWORD)
+        users = [
+            User(
+                username=f'{USERNAME_PREFIX}{number}',
+                email=f'{USERNAME_PREFIX}{number}@example.com',
+                first_name='Пользователь',
+                last_name=str(number),
+                password=password,
+            )
+            for number in range(start, start + count)
+        ]
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        return list(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).order_by('pk'))
+
+    def create_tags(self):
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+        return list(Tag.objects.all())
+
+    def create_image(self):
+        if default_storage.exists(IMAGE_NAME):
+            return IMAGE_NAME
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), '#E26C2D').save(buffer, 'JPEG')
+        return default_storage.save(
+            IMAGE_NAME, ContentFile(buffer.getvalue())
+        )
+
+    def create_recipes(self, rng, users, tags, count):
+        image = self.create_image()
+        author_weights = zipf_weights(len(users))
+        dish_weights = zipf_weights(len(DISHES))
+        word_weights = zipf_weights(len(TEXT_WORDS))
+        now = timezone.now()
+        last = Recipe.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        recipes = [
+            Recipe(
+                author=rng.choices(users, cum_weights=author_weights)[0],
+                name='{} {} №{}'.format(
+                    rng.choices(DISHES, cum_weights=dish_weights)[0],
+                    rng.choice(STYLES),
+                    number,
+                ),
+                text=' '.join(rng.choices(
+                    TEXT_WORDS, cum_weights=word_weights, k=TEXT_LENGTH
+                )).capitalize() + '.',
+                image=image,
+                cooking_time=rng.randint(5, 180),
+            )
+            for number in range(count)
+        ]
+        Recipe.objects.bulk_create(recipes, batch_size=BATCH_SIZE)
+        recipes = list(
+            Recipe.objects.filter(pk__gt=last, image=image).order_by('pk')
+        )
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(
+                minutes=rng.randint(0, 60 * 24 * 365)
+            )
+        Recipe.objects.bulk_update(
+            recipes, ('pub_date',), batch_size=BATCH_SIZE
+        )
+        ingredients = list(Ingredient.objects.order_by('pk'))
+        ingredients = rng.sample(ingredients, min(len(ingredients), 2000))
+        ingredient_weights = zipf_weights(len(ingredients))
+        tag_weights = zipf_weights(len(tags), 0.5)
+        recipe_tags = []
+        lines = []
+        for recipe in recipes:
+            recipe_tags.extend(
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag.pk)
+                for tag in sample(rng, tags, tag_weights, rng.randint(1, 3))
+            )
+            lines.extend(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=ingredient,
+                    amount=rng.randint(1, 500),
+                )
+                for ingredient in sample(
+                    rng, ingredients, ingredient_weights, rng.randint(3, 12)
+                )
+            )
+        Recipe.tags.through.objects.bulk_create(
+            recipe_tags, batch_size=BATCH_SIZE
+        )
+        RecipeIngredient.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+        return recipes
+
+    def create_relations(self, rng, users, recipes):
+        recipe_weights = zipf_weights(len(recipes))
+        author_weights = zipf_weights(len(users))
+        favorites, carts, subscriptions = [], [], []
+        for user in users:
+            favorites.extend(
+                FavoriteRecipe(user=user, recipe=recipe)
+                for recipe in sample(
+                    rng, recipes, recipe_weights, rng.randint(0, 30)
+                )
+            )
+            carts.extend(
+                ShoppingCart(user=user, recipe=recipe)
+                for recipe in sample(
+                    rng, recipes, recipe_weights, rng.randint(0, 8)
+                )
+            )
+            subscriptions.extend(
+                Subscribe(user=user, author=author)
+                for author in sample(
+                    rng, users, author_weights, rng.randint(0, 20)
+                )
+                if author != user
+            )
+        FavoriteRecipe.objects.bulk_create(favorites, batch_size=BATCH_SIZE)
+        ShoppingCart.objects.bulk_create(carts, batch_size=BATCH_SIZE)
+        Subscribe.objects.bulk_create(subscriptions, batch_size=BATCH_SIZE)
@@ -0,0 +1,40 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+FILL_AND_INDEX = (
+    "UPDATE recipes_recipe SET search_vector = "
+    "setweight(to_tsvector('russian', COALESCE(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', COALESCE(text, '')), 'B')",
+    'CREATE INDEX IF NOT EXISTS recipe_search_vector_idx '
+    'ON recipes_recipe USING gin (search_vector)',
+)
+DROP_INDEX = (
+    'DROP INDEX IF EXISTS recipe_search_vector_idx',
+)
+
+
+def postgresql_only(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(
+            postgresql_only(FILL_AND_INDEX), postgresql_only(DROP_INDEX)
+        ),
+    ]
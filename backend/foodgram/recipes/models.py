@@ -1,11 +1,49 @@
+from collections import defaultdict
+from itertools import chain
+
 from django.core.validators import MinValueValidator, RegexValidator
-from django.db import models
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, SearchVectorField,
+    TrigramSimilarity
+)
+from django.db import connections, models
+from django.db.models.functions import Lower, RowNumber
+from django.utils import timezone
+
+from users.models import Subscribe, User
 
-from users.models import User
+from . import search
 
 MAX_LENGTH = 200
 
 
+class IngredientQuerySet(models.QuerySet):
+    """Выборки ингредиентов."""
+
+    def search(self, name, limit):
+        """Ингредиенты, похожие на name: сначала совпадающие по началу
+        названия, затем по убыванию похожести.
+
+        На PostgreSQL использует индексы по lower(name) из миграций,
+        на остальных базах ранжирует весь справочник в памяти.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return search.rank(self, name, limit)
+        name = name.lower()
+        return self.alias(name_lower=Lower('name')).filter(
+            models.Q(name_lower__startswith=name)
+            | models.Q(name_lower__contains=name)
+            | models.Q(name_lower__trigram_similar=name)
+        ).annotate(
+            is_prefix=models.Case(
+                models.When(name_lower__startswith=name, then=True),
+                default=False,
+                output_field=models.BooleanField(),
+            ),
+            similarity=TrigramSimilarity(Lower('name'), name),
+        ).order_by('-is_prefix', '-similarity', 'name')[:limit]
+
+
 class Ingredient(models.Model):
     """Модель ингредиентов."""
     name = models.CharField(
@@ -17,6 +55,8 @@ class Ingredient(models.Model):
         max_length=MAX_LENGTH,
     )
 
+    objects = IngredientQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
@@ -66,6 +106,138 @@ class Tag(models.Model):
         return self.name
 
 
+SEARCH_CONFIG = 'russian'
+# Поисковый вектор рецепта: совпадения в названии весят больше,
+# чем в описании.
+SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+)
+
+# Порядок ленты рецептов по параметру ordering, последнее поле
+# делает порядок однозначным для пагинации по курсору.
+RECIPE_ORDERINGS = {
+    'new': ('-pub_date', 'id'),
+    'popular': ('-favorites_count', '-id'),
+    'trending': ('-score__trending', '-id'),
+}
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Выборки рецептов."""
+
+    def ordered(self, ordering):
+        """Рецепты в порядке ordering из RECIPE_ORDERINGS."""
+        recipes = self.order_by(*RECIPE_ORDERINGS[ordering])
+        if ordering == 'trending':
+            return recipes.filter(score__isnull=False).select_related('score')
+        return recipes
+
+    def with_user_flags(self, user):
+        """Флаги избранного, корзины и подписки для пользователя."""
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=models.Value(False),
+                is_in_shopping_cart=models.Value(False),
+                author_is_subscribed=models.Value(False),
+            )
+        return self.annotate(
+            is_favorited=models.Exists(FavoriteRecipe.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            is_in_shopping_cart=models.Exists(ShoppingCart.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            author_is_subscribed=models.Exists(Subscribe.objects.filter(
+                user=user, author=models.OuterRef('author')
+            )),
+        )
+
+    def for_feed(self, user):
+        """Рецепты со всеми связанными данными для отображения."""
+        return self.defer('search_vector').select_related(
+            'author'
+        ).prefetch_related(
+            models.Prefetch('tags'),
+            models.Prefetch(
+                'ingredient_list',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        ).with_user_flags(user)
+
+    def search(self, query):
+        """Рецепты по словам из названия и описания, самые подходящие
+        первыми.
+
+        На PostgreSQL ищет по индексированному search_vector с русской
+        морфологией, на остальных базах сравнивает слова в памяти.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return self.search_in_memory(query)
+        query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return self.filter(search_vector=query).annotate(
+            rank=SearchRank(models.F('search_vector'), query)
+        ).order_by('-rank', '-pub_date', 'id')
+
+    def search_in_memory(self, query):
+        patterns = search.word_patterns(query)
+        ranks = defaultdict(list)
+        rows = self.prefetch_related(None).values_list('pk', 'name', 'text')
+        for pk, name, text in rows.iterator():
+            rank = search.text_rank(name, text, patterns)
+            if rank:
+                ranks[rank].append(pk)
+        return self.filter(pk__in=chain(*ranks.values())).annotate(
+            rank=models.Case(
+                *(
+                    models.When(pk__in=pks, then=models.Value(rank))
+                    for rank, pks in ranks.items()
+                ),
+                default=models.Value(0.0),
+                output_field=models.FloatField(),
+            )
+        ).order_by('-rank', '-pub_date', 'id')
+
+    def update_search_vector(self):
+        """Пересчёт search_vector, нужен только на PostgreSQL."""
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        return self.update(search_vector=SEARCH_VECTOR)
+
+    def followed_by(self, user):
+        """Рецепты авторов, на которых подписан user.
+
+        Подписки подставляются подзапросом author_id IN (...), поэтому
+        лента читается по индексу (author, -pub_date) одним запросом.
+        """
+        return self.filter(author__in=Subscribe.objects.filter(
+            user=user
+        ).values('author'))
+
+    def latest_for_authors(self, authors, limit=None):
+        """Последние рецепты авторов одним запросом, не больше limit
+        на каждого автора."""
+        recipes = self.filter(author__in=authors)
+        if limit is None or not authors:
+            return recipes
+        recipes = recipes.annotate(
+            author_rank=models.Window(
+                RowNumber(),
+                partition_by=models.F('author'),
+                order_by=models.F('pub_date').desc(),
+            )
+        )
+        sql, params = recipes.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) AS ranked '
+            'WHERE ranked.author_rank <= %s '
+            'ORDER BY ranked.author_id, ranked.author_rank',
+            (*params, limit),
+        )
+
+
 class Recipe(models.Model):
     """Модель рецептов."""
     author = models.ForeignKey(
@@ -82,6 +254,12 @@ class Recipe(models.Model):
         verbose_name='Картинка блюда',
         upload_to='recipes/images',
     )
+    image_renditions = models.JSONField(
+        verbose_name='Копии картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание блюда'
     )
@@ -107,16 +285,82 @@ class Recipe(models.Model):
         auto_now_add=True,
         editable=False,
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в корзину',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=('-pub_date', 'id'),
+                name='recipe_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('-favorites_count', '-id'),
+                name='recipe_favorites_count_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeScore(models.Model):
+    """Рейтинг рецепта для ленты «в тренде».
+
+    Пересчитывается командой compute_trending, см. recipes.trending.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт',
+    )
+    trending = models.FloatField(
+        verbose_name='Рейтинг в тренде',
+        default=0,
+    )
+    updated = models.DateTimeField(
+        verbose_name='Время пересчёта',
+        default=timezone.now,
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                fields=('-trending', '-recipe'),
+                name='recipe_score_trending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.trending:.2f}'
+
+
 class RecipeIngredient(models.Model):
     """Модель связывающая рецепты и ингредиенты, с указанием их количества."""
     recipe = models.ForeignKey(
@@ -166,6 +410,10 @@ class FavoriteRecipe(models.Model):
         related_name='favorite_recipe',
         verbose_name='Избранный рецепт'
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+    )
 
     class Meta:
         constraints = [
@@ -174,6 +422,16 @@ class FavoriteRecipe(models.Model):
                 name='unique_favourite',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='favorite_recipe_user_idx',
+            ),
+            models.Index(
+                fields=('created',),
+                name='favorite_recipe_created_idx',
+            ),
+        ]
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
         ordering = ('id',)
@@ -196,6 +454,10 @@ class ShoppingCart(models.Model):
         related_name='shopping_recipe',
         verbose_name='Рецепт'
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+    )
 
     class Meta:
         verbose_name = 'Корзина'
@@ -206,6 +468,117 @@ class ShoppingCart(models.Model):
                 name='unique_shopping_cart'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='shopping_cart_recipe_user_idx',
+            ),
+            models.Index(
+                fields=('created',),
+                name='shopping_cart_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe.name}'
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    """Выборки сводного списка покупок."""
+
+    def apply(self, users, amounts):
+        """Изменение количества ингредиентов в списках покупок.
+
+        amounts — словарь {id ингредиента: на сколько изменить}.
+        """
+        amounts = {key: value for key, value in amounts.items() if value}
+        if not users or not amounts:
+            return
+        items = {
+            (item.user_id, item.ingredient_id): item
+            for item in self.filter(user__in=users, ingredient__in=amounts)
+        }
+        created, updated, deleted = [], [], []
+        for user in users:
+            for ingredient, amount in amounts.items():
+                item = items.get((user, ingredient))
+                if item is None:
+                    if amount > 0:
+                        created.append(self.model(
+                            user_id=user,
+                            ingredient_id=ingredient,
+                            total_amount=amount,
+                        ))
+                    continue
+                item.total_amount += amount
+                if item.total_amount > 0:
+                    updated.append(item)
+                else:
+                    deleted.append(item.pk)
+        self.bulk_create(created)
+        self.bulk_update(updated, ('total_amount',))
+        self.filter(pk__in=deleted).delete()
+
+    def rebuild(self):
+        """Пересчёт всех списков покупок по корзинам."""
+        self.all().delete()
+        self.bulk_create(
+            self.model(
+                user_id=row['user'],
+                ingredient_id=row['ingredient'],
+                total_amount=row['total_amount'],
+            )
+            for row in self.aggregate_carts()
+        )
+
+    def aggregate_carts(self):
+        """Списки покупок, посчитанные напрямую по корзинам."""
+        return (
+            RecipeIngredient.objects
+            .annotate(user=models.F('recipe__shopping_recipe__user'))
+            .filter(user__isnull=False)
+            .values('user', 'ingredient')
+            .annotate(total_amount=models.Sum('amount'))
+            .order_by()
+        )
+
+
+class ShoppingListItem(models.Model):
+    """Модель сводного списка покупок пользователя.
+
+    Хранит суммарное количество каждого ингредиента по всем рецептам
+    в корзине и обновляется вместе с корзиной.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Ингредиент',
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+    )
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f'{self.user.username} - {self.ingredient.name} '
+            f'{self.total_amount} {self.ingredient.measurement_unit}'
+        )
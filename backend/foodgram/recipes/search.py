@@ -0,0 +1,135 @@
+"""Поиск без поддержки со стороны базы.
+
+Для ингредиентов повторяет логику pg_trgm, чтобы выдача на SQLite
+совпадала с выдачей на PostgreSQL, и держит в памяти процесса индекс
+названий для автодополнения по началу слова. Для рецептов грубо
+заменяет полнотекстовый поиск PostgreSQL при локальной разработке.
+"""
+import re
+import threading
+from bisect import bisect_left
+
+from .versions import bump_version, get_version
+
+SIMILARITY_THRESHOLD = 0.3
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return text.casefold().replace('ё', 'е')
+
+
+def trigrams(text):
+    """Триграммы строки в том виде, как их строит pg_trgm."""
+    result = set()
+    for word in WORD_RE.findall(normalize(text)):
+        word = f'  {word} '
+        result.update(word[i:i + 3] for i in range(len(word) - 2))
+    return result
+
+
+def similarity(first, second):
+    first, second = trigrams(first), trigrams(second)
+    if not first or not second:
+        return 0
+    common = len(first & second)
+    return common / (len(first) + len(second) - common)
+
+
+def rank(ingredients, query, limit):
+    """Сначала совпадения по началу названия, затем по похожести."""
+    query = normalize(query)
+    ranked = []
+    for ingredient in ingredients:
+        name = normalize(ingredient.name)
+        score = similarity(name, query)
+        if (
+            name.startswith(query)
+            or query in name
+            or score >= SIMILARITY_THRESHOLD
+        ):
+            ranked.append(
+                (not name.startswith(query), -score, name, ingredient)
+            )
+    ranked.sort(key=lambda item: item[:3])
+    return [item[3] for item in ranked[:limit]]
+
+
+def stem(word):
+    """Грубая замена русской морфологии: слово без окончания."""
+    return word[:max(len(word) - 2, 3)]
+
+
+def word_patterns(query):
+    """Шаблоны начала слов запроса для text_rank, без учёта регистра
+    и разницы между е и ё."""
+    return [
+        re.compile(
+            r'\b' + re.escape(stem(word)).replace('е', '[её]'), re.IGNORECASE
+        )
+        for word in WORD_RE.findall(normalize(query))
+    ]
+
+
+def text_rank(name, text, patterns):
+    """Ранг рецепта для поиска: каждое слово запроса должно найтись
+    в названии (вес 1) или в описании (вес 0.4)."""
+    rank = 0
+    for pattern in patterns:
+        if pattern.search(name):
+            rank += 1
+        elif pattern.search(text):
+            rank += 0.4
+        else:
+            return 0
+    return rank
+
+
+class IngredientIndex:
+    """Отсортированные названия ингредиентов в памяти процесса.
+
+    Загружается при первом обращении. Индекс привязан к версии
+    справочника ингредиентов в кеше, поэтому после изменения справочника
+    все воркеры перечитывают его при следующем запросе.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.entries = ([], [])
+        self.lock = threading.Lock()
+
+    def invalidate(self):
+        bump_version('ingredient')
+
+    def load(self):
+        version = get_version('ingredient')
+        if version == self.version:
+            return
+        from .models import Ingredient
+        with self.lock:
+            entries = sorted(
+                (
+                    (normalize(ingredient.name), ingredient)
+                    for ingredient in Ingredient.objects.order_by('pk')
+                ),
+                key=lambda entry: entry[0]
+            )
+            self.entries = (
+                [name for name, _ in entries],
+                [ingredient for _, ingredient in entries],
+            )
+            self.version = version
+
+    def prefix(self, query):
+        """Ингредиенты, название которых начинается с query."""
+        self.load()
+        query = normalize(query)
+        names, ingredients = self.entries
+        start = bisect_left(names, query)
+        end = start
+        while end < len(names) and names[end].startswith(query):
+            end += 1
+        return ingredients[start:end]
+
+
+ingredient_index = IngredientIndex()
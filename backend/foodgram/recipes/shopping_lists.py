@@ -0,0 +1,47 @@
+"""Учёт изменений корзин и рецептов в сводных списках покупок.
+
+Сохранение и удаление отдельных объектов (через API, админку или
+каскадом при удалении рецепта, автора или ингредиента) учитываются
+сигналами из recipes.signals: удаления — в pre_delete, пока связанные
+строки ещё в базе. bulk_create и bulk_update сигналов не вызывают,
+их учитывает вызывающий код через update_shopping_cart.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import User
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+
+def recipe_amounts(recipe_id, sign=1):
+    """Количества ингредиентов рецепта по их id."""
+    return {
+        ingredient: sign * amount
+        for ingredient, amount in RecipeIngredient.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient', 'amount')
+    }
+
+
+def cart_users(recipe_id):
+    """id пользователей, у которых рецепт в корзине."""
+    return ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+        'user', flat=True
+    )
+
+
+def update_shopping_cart(users, amounts):
+    """Учёт изменения списков покупок пользователей.
+
+    Обновление отметки времени блокирует строки пользователей,
+    поэтому параллельные изменения одного списка выполняются по очереди.
+    """
+    users = list(users)
+    if not users:
+        return
+    with transaction.atomic():
+        User.objects.filter(pk__in=users).update(
+            shopping_cart_updated=timezone.now()
+        )
+        ShoppingListItem.objects.apply(users, amounts)
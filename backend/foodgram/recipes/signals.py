@@ -0,0 +1,165 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from users.models import Subscribe
+
+from . import counters
+from .models import (
+    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, RecipeScore,
+    ShoppingCart, Tag
+)
+from .shopping_lists import cart_users, recipe_amounts, update_shopping_cart
+from .versions import bump_version
+
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+SEARCH_FIELDS = {'name', 'text'}
+
+
+def bump_on_commit(name):
+    transaction.on_commit(partial(bump_version, name))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    bump_on_commit('ingredient')
+    bump_on_commit('recipe')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(**kwargs):
+    bump_on_commit('tag')
+    bump_on_commit('recipe')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def invalidate_recipes(**kwargs):
+    bump_on_commit('recipe')
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_score(instance, created, **kwargs):
+    if created:
+        RecipeScore.objects.create(recipe=instance)
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_vector(instance, update_fields=None, **kwargs):
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(action, **kwargs):
+    if action.startswith('post_'):
+        bump_on_commit('recipe')
+
+
+@receiver(pre_save, sender=get_user_model())
+def remember_author_fields(sender, instance, update_fields=None, **kwargs):
+    # Лента показывает только имя и почту автора: сохранение пользователя
+    # без рецептов (регистрация, вход, смена пароля) кеш не сбрасывает.
+    instance.saved_author = None
+    if instance.pk is None or (
+        update_fields is not None and not AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    instance.saved_author = sender.objects.filter(
+        pk=instance.pk, recipes_count__gt=0
+    ).values(*AUTHOR_FIELDS).first()
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_authors(instance, **kwargs):
+    saved = getattr(instance, 'saved_author', None)
+    if saved and any(
+        getattr(instance, field) != value for field, value in saved.items()
+    ):
+        bump_on_commit('recipe')
+
+
+@receiver((post_save, post_delete), sender=FavoriteRecipe)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscribe)
+def invalidate_user_flags(instance, **kwargs):
+    bump_on_commit(f'user_flags:{instance.user_id}')
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Subscribe)
+def increment_counters(sender, instance, created, **kwargs):
+    if created:
+        change_counters(sender, instance, 1)
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Subscribe)
+def decrement_counters(sender, instance, **kwargs):
+    change_counters(sender, instance, -1)
+
+
+def change_counters(sender, instance, delta):
+    for model, field, related, foreign_key in counters.COUNTERS:
+        if related is sender:
+            counters.change(
+                model, getattr(instance, f'{foreign_key}_id'), field, delta
+            )
+
+
+def deleted_model(origin):
+    """Модель, с удаления которой начался каскад."""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(instance, created, **kwargs):
+    if created:
+        update_shopping_cart(
+            [instance.user_id], recipe_amounts(instance.recipe_id)
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(instance, **kwargs):
+    update_shopping_cart(
+        [instance.user_id], recipe_amounts(instance.recipe_id, -1)
+    )
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_ingredient_line(instance, **kwargs):
+    instance.saved_line = RecipeIngredient.objects.filter(
+        pk=instance.pk
+    ).values_list('ingredient', 'amount').first() if instance.pk else None
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def update_shopping_lists_on_line_save(instance, **kwargs):
+    amounts = {instance.ingredient_id: instance.amount}
+    if instance.saved_line:
+        ingredient, amount = instance.saved_line
+        amounts[ingredient] = amounts.get(ingredient, 0) - amount
+    update_shopping_cart(cart_users(instance.recipe_id), amounts)
+
+
+@receiver(pre_delete, sender=RecipeIngredient)
+def update_shopping_lists_on_line_delete(instance, origin=None, **kwargs):
+    # При удалении самого рецепта (или его автора) вместе со строками
+    # удаляются и корзины с ним, их учитывает remove_from_shopping_list.
+    if deleted_model(origin) not in (RecipeIngredient, Ingredient):
+        return
+    update_shopping_cart(
+        cart_users(instance.recipe_id),
+        {instance.ingredient_id: -instance.amount}
+    )
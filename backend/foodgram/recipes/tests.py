@@ -0,0 +1,115 @@
+import os
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from api.fields import image_srcset, image_url
+from recipes import images
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+
+class LoadIngredientsTest(TestCase):
+    """Загрузка ингредиентов из CSV и JSON."""
+
+    def load(self, extension, content):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f'ingredients{extension}')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(content)
+            call_command('load_ingredients', path, stdout=StringIO())
+
+    def test_csv(self):
+        self.load('.csv', 'абрикос,г\n\nбанан,шт\n')
+        self.assertEqual(
+            set(Ingredient.objects.values_list('name', 'measurement_unit')),
+            {('абрикос', 'г'), ('банан', 'шт')}
+        )
+
+    def test_json(self):
+        self.load(
+            '.json',
+            '[{"name": "абрикос", "measurement_unit": "г"},\n'
+            ' {"name": "банан", "measurement_unit": "шт"}]\n'
+        )
+        self.assertEqual(Ingredient.objects.count(), 2)
+
+    def test_broken_files(self):
+        for extension, content in (
+            ('.csv', 'абрикос,г\nбанан\n'),
+            ('.json', '[{"name": "абрикос", "measurement_unit": "г"}, {"na'),
+            ('.json', '[{"name": "абрикос", "measurement_unit": "г"}'),
+            ('.json', '[{"name": "абрикос"}]'),
+            ('.json', '[{"name": "абрикос", "measurement_unit": "г"}] x'),
+            ('.json', ''),
+        ):
+            with self.subTest(content=content):
+                with self.assertRaises(CommandError):
+                    self.load(extension, content)
+                self.assertFalse(Ingredient.objects.exists())
+
+
+class ImageRenditionsTest(TestCase):
+    """Копии картинок не больше оригинала и без повторов в srcset."""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.author = User.objects.create_user(
+            username='author', email='author@example.org',
+            first_name='Автор', last_name='Рецептов', password='pass12345!'
+        )
+
+    def create_recipe(self, width):
+        buffer = BytesIO()
+        Image.new('RGB', (width, width // 2), 'orange').save(buffer, 'JPEG')
+        return Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Описание',
+            cooking_time=1,
+            image=ContentFile(buffer.getvalue(), name='recipe.jpg'),
+        )
+
+    def test_widths(self):
+        for width, expected in (
+            (300, {'thumbnail': 300}),
+            (800, {'thumbnail': 480, 'medium': 800}),
+            (2000, {'thumbnail': 480, 'medium': 1200}),
+        ):
+            with self.subTest(width=width):
+                renditions = images.build_renditions(
+                    self.create_recipe(width)
+                )
+                self.assertEqual(
+                    {
+                        name: rendition['width']
+                        for name, rendition in renditions.items()
+                        if name != 'original'
+                    },
+                    expected
+                )
+
+    def test_small_image_urls(self):
+        recipe = self.create_recipe(300)
+        recipe.image_renditions = images.build_renditions(recipe)
+        self.assertEqual(
+            image_url(recipe, 'medium', None),
+            image_url(recipe, 'thumbnail', None)
+        )
+        self.assertEqual(len(image_srcset(recipe, None).split(', ')), 1)
+
+    def test_duplicate_widths(self):
+        recipe = self.create_recipe(300)
+        recipe.image_renditions = {
+            name: {'width': 300, 'height': 150, 'jpeg': f'{name}.jpeg',
+                   'webp': f'{name}.webp'}
+            for name in images.RENDITIONS
+        }
+        self.assertEqual(
+            image_srcset(recipe, None), '/media/thumbnail.webp 300w'
+        )
@@ -0,0 +1,66 @@
+"""Рейтинг рецептов для ленты «в тренде».
+
+Рейтинг — сумма недавних добавлений рецепта в избранное и в корзину
+за TRENDING_WINDOW_DAYS, где каждое добавление весит вдвое меньше
+за каждые TRENDING_HALF_LIFE_HOURS своего возраста. Считается
+командой compute_trending и хранится в RecipeScore, лента только
+читает готовые значения по индексу. После пересчёта сбрасывается
+кеш ленты, чтобы ?ordering=trending сразу показывал новый порядок.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FavoriteRecipe, Recipe, RecipeScore, ShoppingCart
+from .versions import bump_version
+
+# Вес добавления по виду: в избранное и в корзину.
+WEIGHTS = ((FavoriteRecipe, 1.0), (ShoppingCart, 1.0))
+
+
+def scores(now):
+    """Рейтинги рецептов с добавлениями за окно {id рецепта: рейтинг}."""
+    since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    half_life = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    result = defaultdict(float)
+    for model, weight in WEIGHTS:
+        rows = model.objects.filter(created__gte=since).values_list(
+            'recipe', 'created'
+        ).order_by()
+        for recipe, created in rows.iterator():
+            result[recipe] += weight * 0.5 ** ((now - created) / half_life)
+    return result
+
+
+def update():
+    """Пересчёт RecipeScore, возвращает число рецептов в тренде."""
+    now = timezone.now()
+    result = scores(now)
+    with transaction.atomic():
+        RecipeScore.objects.bulk_create(
+            (
+                RecipeScore(recipe_id=pk)
+                for pk in Recipe.objects.filter(
+                    score__isnull=True
+                ).values_list('pk', flat=True)
+            ),
+            ignore_conflicts=True,
+        )
+        RecipeScore.objects.bulk_create(
+            [
+                RecipeScore(recipe_id=pk, trending=score, updated=now)
+                for pk, score in result.items()
+            ],
+            update_conflicts=True,
+            unique_fields=('recipe',),
+            update_fields=('trending', 'updated'),
+            batch_size=1000,
+        )
+        RecipeScore.objects.filter(updated__lt=now).exclude(
+            trending=0
+        ).update(trending=0, updated=now)
+    bump_version('recipe')
+    return len(result)
@@ -0,0 +1,27 @@
+"""Версии справочников для инвалидации кешей.
+
+Версия хранится в общем кеше и увеличивается при каждом изменении
+модели, поэтому ключи со старой версией просто перестают читаться.
+"""
+import time
+
+from django.core.cache import cache
+
+KEY = 'version:{}'
+
+
+def get_version(name):
+    key = KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    key = KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='shopping_cart_updated',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Изменение списка покупок'),
+        ),
+    ]
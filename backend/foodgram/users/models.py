@@ -43,6 +43,22 @@ class User(AbstractUser):
         blank=False,
         null=False,
     )
+    shopping_cart_updated = models.DateTimeField(
+        'Изменение списка покупок',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ['id']